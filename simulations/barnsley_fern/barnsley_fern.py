@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -16,6 +16,13 @@ class Transformation(ABC):
         return self.A.dot(xy) + self.B
 
 
+class AffineTransformation(Transformation):
+    # Arbitrary affine transformation A.dot(xy) + B
+    def __init__(self, A: npt.ArrayLike, B: npt.ArrayLike):
+        self.A = np.asarray(A, dtype=float)
+        self.B = np.asarray(B, dtype=float)
+
+
 class F1(Transformation):
     A = np.array([[0, 0], [0, 0.16]])
     B = np.array([0, 0])
@@ -36,28 +43,163 @@ class F4(Transformation):
     B = np.array([0, 0.44])
 
 
-class BarnsleyFern:
-    def __init__(self):
-        # Instantiate the four possible transformations
-        self.f: List[Transformation] = [F1(), F2(), F3(), F4()]
-        # Probabilities assigned to each transformation
-        self.p: List[float] = [0.01, 0.85, 0.07, 0.07]
-        # Coordinates as list
-        self._xy: List[Tuple[int, int]] = [(0, 0)]
+class IFS:
+    def __init__(
+        self,
+        f: Sequence[Transformation],
+        p: Optional[Sequence[float]] = None,
+        n_chains: int = 1,
+        seed: Optional[int] = None,
+    ):
+        # Iterated function system rendered with the chaos game. f are the
+        # affine transformations and p their probabilities (by default,
+        # proportional to the area scaling |det(A)| of each transformation).
+        # n_chains independent chains, all starting at the origin, are
+        # advanced together as a (n_chains, 2) array
+        if n_chains < 1:
+            raise ValueError(f"n_chains must be >= 1, got {n_chains}")
+        self.f: List[Transformation] = list(f)
+        if p is None:
+            p = [max(abs(np.linalg.det(t.A)), 1e-3) for t in self.f]
+        self.p: List[float] = [float(v) / float(sum(p)) for v in p]
+        self.n_chains = n_chains
+        self.rng = np.random.default_rng(seed)
+        # Coordinates as preallocated array. Only the first _n points are
+        # valid. Points of the same iteration of all chains are contiguous
+        self._xy: npt.NDArray = np.zeros((n_chains, 2))
+        self._n: int = n_chains
 
     @property
     def xy(self) -> npt.NDArray:
-        # Coordinates as numpy array
-        return np.array(self._xy)
+        # Coordinates as numpy array (view, no copy)
+        return self._xy[: self._n]
 
     def iteration(self) -> None:
-        # Choose one of the four transformations based on the probabilies
-        # and apply it to last point
-        self._xy.append(np.random.choice(self.f, p=self.p)(*self._xy[-1]))  # type: ignore
+        # Choose one of the transformations based on the probabilies and
+        # apply it to the last point of each chain
+        self.generate(1)
+
+    def _reserve(self, npoints: int) -> None:
+        # Grow geometrically, so that repeated calls are amortized
+        if self._n + npoints > len(self._xy):
+            xy = np.empty((max(self._n + npoints, 2 * len(self._xy)), 2))
+            xy[: self._n] = self.xy
+            self._xy = xy
+
+    def generate(self, niter: int, chunk_size: int = 2**16) -> None:
+        # Run niter iterations of every chain, storing all points
+        self._reserve(niter * self.n_chains)
+        last = self._xy[self._n - self.n_chains : self._n].copy()
+        for points in self.iterate(niter, last, chunk_size):
+            self._xy[self._n : self._n + len(points)] = points
+            self._n += len(points)
+
+    def iterate(
+        self, niter: int, start: npt.NDArray, chunk_size: int = 2**16
+    ) -> Iterator[npt.NDArray]:
+        # Run niter iterations of every chain starting from the (n_chains, 2)
+        # points start, yielding chunks of about chunk_size points without
+        # storing them
+        if self.n_chains == 1:
+            yield from self._iterate_single_chain(niter, start[0], chunk_size)
+        else:
+            yield from self._iterate_chains(niter, start, chunk_size)
+
+    def _iterate_chains(
+        self, niter: int, xy: npt.NDArray, chunk_size: int
+    ) -> Iterator[npt.NDArray]:
+        # Advance all chains at once, selecting one transformation per chain
+        A = np.stack([t.A for t in self.f])
+        B = np.stack([t.B for t in self.f])
+        n = self.n_chains
+        iter_per_chunk = max(1, chunk_size // n)
+        for start in range(0, niter, iter_per_chunk):
+            points = np.empty((min(iter_per_chunk, niter - start), n, 2))
+            for i in range(len(points)):
+                k = self.rng.choice(len(self.f), size=n, p=self.p)
+                x, y = xy.T
+                points[i, :, 0] = A[k, 0, 0] * x + A[k, 0, 1] * y + B[k, 0]
+                points[i, :, 1] = A[k, 1, 0] * x + A[k, 1, 1] * y + B[k, 1]
+                xy = points[i]
+            yield points.reshape(-1, 2)
+
+    def _iterate_single_chain(
+        self, niter: int, xy: npt.NDArray, chunk_size: int
+    ) -> Iterator[npt.NDArray]:
+        # Draw all transformations at once, then apply them point by point
+        # (each point depends on the previous one) with the coefficients
+        # as plain floats, which is much faster than numpy for 2x2 matrices
+        a00, a01, a10, a11 = (
+            [float(t.A[i, j]) for t in self.f] for i, j in np.ndindex(2, 2)
+        )
+        b0, b1 = ([float(t.B[i]) for t in self.f] for i in range(2))
 
-    def generate(self, niter: int) -> None:
-        for _ in range(niter):
-            self.iteration()
+        x, y = float(xy[0]), float(xy[1])
+        for start in range(0, niter, chunk_size):
+            indices = self.rng.choice(
+                len(self.f), size=min(chunk_size, niter - start), p=self.p
+            )
+            xs, ys = [], []
+            for k in indices.tolist():
+                x, y = (
+                    a00[k] * x + a01[k] * y + b0[k],
+                    a10[k] * x + a11[k] * y + b1[k],
+                )
+                xs.append(x)
+                ys.append(y)
+            yield np.column_stack([xs, ys])
+
+    def histogram(
+        self,
+        niter: int,
+        shape: Tuple[int, int] = (700, 450),
+        extent: Optional[Tuple[float, float, float, float]] = None,
+        chunk_size: int = 2**16,
+    ) -> Tuple[npt.NDArray, Tuple[float, float, float, float]]:
+        # Count the points of niter iterations of every chain falling in each
+        # pixel of a (rows, columns) image as they are generated, so memory
+        # is proportional to the number of pixels, not of points. The points
+        # are not stored and the chains start from the last stored points.
+        # extent is (xmin, xmax, ymin, ymax). If None is provided, it is
+        # estimated from a short pilot run. Row 0 of the image is ymax
+        last = self._xy[self._n - self.n_chains : self._n].copy()
+        if extent is None:
+            pilot = np.vstack(list(self.iterate(max(1, 10**5 // self.n_chains), last)))
+            (xmin, ymin), (xmax, ymax) = pilot.min(axis=0), pilot.max(axis=0)
+            mx, my = 0.02 * (xmax - xmin), 0.02 * (ymax - ymin)
+            extent = (xmin - mx, xmax + mx, ymin - my, ymax + my)
+
+        nrows, ncols = shape
+        xmin, xmax, ymin, ymax = extent
+        counts = np.zeros(nrows * ncols, dtype=np.int64)
+        for points in self.iterate(niter, last, chunk_size):
+            # floor, not truncation, so that points just outside the extent
+            # are not counted in the first row or column
+            j = np.floor((points[:, 0] - xmin) * (ncols / (xmax - xmin)))
+            i = np.floor((ymax - points[:, 1]) * (nrows / (ymax - ymin)))
+            j, i = j.astype(np.int64), i.astype(np.int64)
+            inside = (i >= 0) & (i < nrows) & (j >= 0) & (j < ncols)
+            counts += np.bincount(
+                i[inside] * ncols + j[inside], minlength=nrows * ncols
+            )
+        return counts.reshape(shape), extent
+
+    def render(
+        self,
+        niter: int,
+        shape: Tuple[int, int] = (700, 450),
+        extent: Optional[Tuple[float, float, float, float]] = None,
+        fname: Optional[str] = None,
+        cmap: str = "Greens",
+    ) -> npt.NDArray:
+        # Density image of niter iterations of every chain (see histogram)
+        # with log tone mapping, from 0 (no points) to 1 (densest pixel).
+        # If fname is provided, saves it as image using the colormap cmap
+        counts, extent = self.histogram(niter, shape, extent)
+        image = np.log1p(counts) / np.log1p(max(counts.max(), 1))
+        if fname is not None:
+            plt.imsave(fname, image, cmap=cmap, vmin=0, vmax=1)
+        return image
 
     def plot(self, ax: Optional[Axes] = None, **kwargs) -> Axes:
         # Plot using ax.plot
@@ -79,12 +221,40 @@ class BarnsleyFern:
         ax.axis("equal")
         # By default, use as color code the iteration step corresponding
         # to the generation of a given point
-        kw = dict(marker="x", s=0.2, c=range(len(self._xy)))
+        kw = dict(marker="x", s=0.2, c=np.arange(self._n) // self.n_chains)
         kw.update(kwargs)
         ax.scatter(*self.xy.T, **kw)
         return ax
 
 
+class BarnsleyFern(IFS):
+    def __init__(self, seed: Optional[int] = None, n_chains: int = 1):
+        # Four transformations of the Barnsley fern and their probabilities
+        super().__init__(
+            [F1(), F2(), F3(), F4()], [0.01, 0.85, 0.07, 0.07], n_chains, seed
+        )
+
+
+class SierpinskiTriangle(IFS):
+    def __init__(self, seed: Optional[int] = None, n_chains: int = 1):
+        A = [[0.5, 0], [0, 0.5]]
+        f = [
+            AffineTransformation(A, [0, 0]),
+            AffineTransformation(A, [0.5, 0]),
+            AffineTransformation(A, [0.25, 3**0.5 / 4]),
+        ]
+        super().__init__(f, None, n_chains, seed)
+
+
+class HeighwayDragon(IFS):
+    def __init__(self, seed: Optional[int] = None, n_chains: int = 1):
+        f = [
+            AffineTransformation([[0.5, -0.5], [0.5, 0.5]], [0, 0]),
+            AffineTransformation([[-0.5, -0.5], [0.5, -0.5]], [1, 0]),
+        ]
+        super().__init__(f, None, n_chains, seed)
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -102,10 +272,38 @@ if __name__ == "__main__":
         help="If true, plot with a colormap representing the iteration step for each point",
         action="store_true",
     )
+    parser.add_argument(
+        "-r",
+        "--render",
+        metavar="fern.png",
+        help="Render density image to file instead of plotting the points",
+    )
+    parser.add_argument(
+        "-f",
+        "--fractal",
+        help="Fractal to be rendered",
+        choices=["fern", "sierpinski", "dragon"],
+        default="fern",
+    )
+    parser.add_argument(
+        "-k",
+        "--chains",
+        type=int,
+        help="Number of independent chains. Each chain runs niter/chains iterations",
+        default=1,
+    )
     args = parser.parse_args()
 
-    fern = BarnsleyFern()
-    fern.generate(args.niter)
+    fractals = dict(
+        fern=BarnsleyFern, sierpinski=SierpinskiTriangle, dragon=HeighwayDragon
+    )
+    fern = fractals[args.fractal](n_chains=args.chains)
+
+    if args.render is not None:
+        fern.render(args.niter // args.chains, fname=args.render)
+        raise SystemExit
+
+    fern.generate(args.niter // args.chains)
 
     if args.color:
         fern.scatter()
@@ -0,0 +1,142 @@
+import csv
+import os
+import argparse
+import numpy as np
+from multiprocessing import Pool
+
+from elementary_ca import ElementaryCA
+
+
+# Columns of the results table
+dtype = np.dtype([
+    ('rule', np.int16), ('size', np.int32), ('seed', np.int64),
+    ('time', np.int32), ('block', np.int8),
+    ('density_mean', np.float32), ('density_final', np.float32),
+    ('entropy', np.float32), ('transient', np.int32), ('period', np.int32),
+])
+key_fields = ('rule', 'size', 'seed', 'time', 'block')
+
+
+def block_entropy(row, block=3):
+    """
+    Shannon entropy (bits per cell) of the blocks of block consecutive cells
+    of a periodic row
+    """
+    index = np.zeros(row.shape, dtype=np.int64)
+    for i in range(block):
+        index = 2*index + np.roll(row, -i)
+    p = np.bincount(index, minlength=2**block) / row.size
+    p = p[p > 0]
+    return -np.sum(p*np.log2(p)) / block
+
+
+def analyse(rule, size, seed, time, block=3):
+    """
+    Runs rule from random seed (see ElementaryCA.init_random_seed) without
+    storing the grid and returns a record of the results table. Density
+    and entropy are averaged over the second half of the rows. transient and
+    period are -1 if the rows do not repeat within time steps
+    """
+    ca = ElementaryCA(rule, size, time, store=False)
+    ca.init_random_seed(seed)
+
+    densities = np.empty(time)
+    entropy = 0.
+    history = {}
+    transient, period = -1, -1
+    for t, row in enumerate(ca.rows()):
+        densities[t] = row.mean()
+        if t >= time//2:
+            entropy += block_entropy(row, block)
+        if period < 0:
+            key = np.packbits(row).tobytes()
+            if key in history:
+                transient, period = history[key], t - history[key]
+                history.clear()
+            else:
+                history[key] = t
+
+    return (rule, size, seed, time, block, densities[time//2:].mean(),
+            densities[-1], entropy/(time - time//2), transient, period)
+
+
+def _analyse(args):
+    return analyse(*args)
+
+
+def load_cache(fname):
+    """
+    Loads cached results as dict {(rule, size, seed, time, block): record}
+    """
+    cache = {}
+    if fname is not None and os.path.exists(fname):
+        with open(fname) as f:
+            for row in csv.DictReader(f):
+                record = tuple(np.array(tuple(row[name] for name in dtype.names),
+                                        dtype=dtype).item())
+                cache[record[:len(key_fields)]] = record
+    return cache
+
+
+def save_csv(fname, results, append=False):
+    """
+    Writes results table (structured array) to csv file
+    """
+    new = not append or not os.path.exists(fname)
+    with open(fname, 'a' if append else 'w', newline='') as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(dtype.names)
+        writer.writerows(results.tolist())
+
+
+def analyse_rules(rules=range(256), seeds=range(16), size=256, time=512,
+                  block=3, processes=None, cache='ca_analysis_cache.csv'):
+    """
+    Analyses every combination of rules and seeds on a pool of processes.
+    Results already in the cache csv file, keyed on (rule, size, seed)
+    together with time and block, are not recomputed, and new results are
+    appended to it. Pass cache=None to disable caching. Returns structured
+    array with one record per (rule, seed)
+    """
+    cached = load_cache(cache)
+    tasks = [(rule, size, seed, time, block) for rule in rules for seed in seeds]
+    missing = [task for task in tasks if task not in cached]
+
+    if missing:
+        with Pool(processes) as pool:
+            computed = pool.map(_analyse, missing, chunksize=8)
+        computed = np.array(computed, dtype=dtype)
+        if cache is not None:
+            save_csv(cache, computed, append=True)
+        for record in computed.tolist():
+            cached[record[:len(key_fields)]] = record
+
+    return np.array([cached[task] for task in tasks], dtype=dtype)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Density, block entropy and period of elementary CA')
+    parser.add_argument('-r', '--rules', type=int, nargs='+',
+                        default=list(range(256)), help='rules to analyse')
+    parser.add_argument('-n', '--nseeds', type=int, default=16,
+                        help='number of random seeds per rule')
+    parser.add_argument('-s', '--size', type=int, default=256,
+                        help='number of cells')
+    parser.add_argument('-t', '--time', type=int, default=512,
+                        help='number of time steps')
+    parser.add_argument('-b', '--block', type=int, default=3,
+                        help='block length for the entropy')
+    parser.add_argument('-p', '--processes', type=int,
+                        help='number of processes. Default: number of CPUs')
+    parser.add_argument('-c', '--cache', default='ca_analysis_cache.csv',
+                        help='cache csv file')
+    parser.add_argument('-o', '--output', default='ca_analysis.csv',
+                        help='output csv file')
+    args = parser.parse_args()
+
+    results = analyse_rules(args.rules, range(args.nseeds), args.size,
+                            args.time, args.block, args.processes, args.cache)
+    save_csv(args.output, results)
+    print('{} records written to {}'.format(len(results), args.output))
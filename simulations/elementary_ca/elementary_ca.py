@@ -1,40 +1,74 @@
 import random
+import zlib
+import struct
 import numpy as np
 import matplotlib.pyplot as plt
-from itertools import cycle
+from PIL import Image, ImageDraw
 
 
 class ElementaryCA():
     __i, __j, __k = np.mgrid[:2, :2, :2]
     pattern_indices = 7 - __k - 2*__j - 4*__i
 
-    def __init__(self, rule, size, time):
+    def __init__(self, rule, size, time, store=True):
+        """
+        Elementary cellular automaton with a periodic row of size cells
+        evolved for time steps (rows). If store is False, only the seed row
+        is kept in memory and the rows are obtained with rows, save_npy or
+        save_png, so that very large times fit in constant memory
+        """
         self.rule = np.array([bool(int(v)) for v in format(rule, '08b')])
         if len(self.rule) != 8:
             raise Exception('rule={} is invalid. rule must be < 256'.format(rule))
 
         self.size = size
         self.time = time
-        self.grid = np.full((self.time, self.size), False)
+        self.store = store
+        self.allocate_grid()
 
         self.pattern_map = self.rule[self.pattern_indices]
 
         self.fig, self.ax = None, None
         self.img = None
 
+    def allocate_grid(self):
+        """
+        Allocates empty grid (only the seed row if self.store is False)
+        """
+        self.grid = np.full((self.time if self.store else 1, self.size), False)
+
+    @property
+    def data(self):
+        """
+        Grid in its internal representation
+        """
+        return self.grid
+
+    def to_bool(self, rows):
+        """
+        Converts rows in the internal representation to boolean
+        """
+        return rows
+
     def set_single_seed(self, j, v=True):
         """
         Sets value for single seed
         """
         self.grid[0, j] = v
 
-    def generate_random_seed(self):
+    def generate_random_seed(self, seed=None):
         """
-        Generates random seed as string with length self.size
+        Generates random seed as string with length self.size. If seed
+        (int) is provided, the string is reproducible and is not printed
         """
-        seed = format(random.getrandbits(self.size), '0{}b'.format(self.size))
-        print('Random seed:', seed)
-        return seed
+        if seed is None:
+            bits = random.getrandbits(self.size)
+        else:
+            bits = random.Random(seed).getrandbits(self.size)
+        seed_str = format(bits, '0{}b'.format(self.size))
+        if seed is None:
+            print('Random seed:', seed_str)
+        return seed_str
 
     def set_seed(self, seed):
         """
@@ -43,31 +77,94 @@ class ElementaryCA():
         j, = np.where([bool(int(v)) for v in seed])
         self.grid[0, j] = True
 
-    def init_random_seed(self):
+    def init_random_seed(self, seed=None):
         """
-        Initializes random seed
+        Initializes random seed (see generate_random_seed)
         """
-        seed = self.generate_random_seed()
+        seed = self.generate_random_seed(seed)
         self.set_seed(seed)
 
+    def step(self, row):
+        """
+        Returns row following row
+        """
+        row = row.view(np.uint8)
+        # Neighbourhood index of each cell (periodic boundary condition).
+        # pattern_map[g1_, g0, g1] == pattern_map.ravel()[4*g1_ + 2*g0 + g1]
+        index = 4*np.roll(row, 1) + 2*row + np.roll(row, -1)
+        return self.pattern_map.ravel()[index]
+
     def run(self):
         """
         Runs cellular automaton
         """
+        if not self.store:
+            raise Exception('run requires store=True. Use rows instead')
         for t in range(1, self.time):
-            for j in range(self.size):
-                neighbors = self.grid[t-1, max(0, j-1):j+2].astype(int)
-                # Periodic boundary condition
-                if j == 0:
-                    g1_ = self.grid[t-1, -1].astype(int)
-                    g0, g1 = neighbors
-                elif j == self.size - 1:
-                    g1_, g0 = neighbors
-                    g1 = self.grid[t-1, 0].astype(int)
-                else:
-                    g1_, g0, g1 = neighbors
-
-                self.grid[t, j] = self.pattern_map[g1_, g0, g1]
+            self.data[t] = self.step(self.data[t-1])
+
+    def _chunks(self, chunk_size):
+        """
+        Generates the self.time rows as boolean (n, size) chunks of at most
+        chunk_size rows, keeping only the current chunk in memory
+        """
+        row = self.data[0].copy()
+        for t0 in range(0, self.time, chunk_size):
+            n = min(chunk_size, self.time - t0)
+            chunk = np.empty((n, *row.shape), dtype=row.dtype)
+            for i in range(n):
+                if t0 + i > 0:
+                    row = self.step(row)
+                chunk[i] = row
+            yield self.to_bool(chunk)
+
+    def rows(self, chunk_size=1):
+        """
+        Generates the self.time rows starting from the seed, keeping only the
+        current row (or chunk of rows) in memory. Yields boolean rows, or
+        (chunk_size, size) arrays if chunk_size > 1
+        """
+        for chunk in self._chunks(chunk_size):
+            yield chunk[0] if chunk_size == 1 else chunk
+
+    def save_npy(self, fname, chunk_size=1024):
+        """
+        Streams rows to a (time, size) boolean .npy file through a memory map
+        """
+        out = np.lib.format.open_memmap(fname, mode='w+', dtype=bool,
+                                        shape=(self.time, self.size))
+        t = 0
+        for chunk in self._chunks(chunk_size):
+            out[t:t+len(chunk)] = chunk
+            t += len(chunk)
+        out.flush()
+        del out
+
+    def save_png(self, fname, chunk_size=1024):
+        """
+        Streams rows to a 1-bit grayscale PNG file (alive cells are black),
+        compressing one chunk of rows at a time
+        """
+        def write_chunk(f, tag, data):
+            f.write(struct.pack('>I', len(data)) + tag + data)
+            f.write(struct.pack('>I', zlib.crc32(tag + data)))
+
+        compressor = zlib.compressobj()
+        with open(fname, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            # Width, height, bit depth 1, grayscale, default compression,
+            # filter and interlace methods
+            write_chunk(f, b'IHDR', struct.pack('>IIBBBBB', self.size,
+                                                self.time, 1, 0, 0, 0, 0))
+            for chunk in self._chunks(chunk_size):
+                # Filter type 0 (None) byte before each packed row
+                packed = np.packbits(~chunk, axis=1)
+                packed = np.hstack([np.zeros((len(packed), 1), np.uint8), packed])
+                data = compressor.compress(packed.tobytes())
+                if data:
+                    write_chunk(f, b'IDAT', data)
+            write_chunk(f, b'IDAT', compressor.flush())
+            write_chunk(f, b'IEND', b'')
 
     def plot(self, ax=None, **kwargs):
         """
@@ -82,6 +179,94 @@ class ElementaryCA():
         return self.ax
 
 
+class PackedElementaryCA(ElementaryCA):
+    """
+    Elementary cellular automaton with each row stored as little-endian
+    uint64 words (bit b of word w is cell 64*w + b), using 8x less memory
+    than ElementaryCA. The rule is applied to 64 cells at once as a boolean
+    expression of the row shifted left and right.
+    """
+    one, msb = np.uint64(1), np.uint64(63)
+
+    def allocate_grid(self):
+        """
+        Allocates empty packed grid
+        """
+        self.nwords = -(-self.size // 64)
+        self.words = np.zeros((self.time if self.store else 1, self.nwords),
+                              dtype='<u8')
+        # Position of the last cell in the last word
+        self.last_bit = np.uint64((self.size - 1) % 64)
+
+    @property
+    def grid(self):
+        """
+        Unpacked (time, size) boolean grid
+        """
+        return self.to_bool(self.words)
+
+    @property
+    def data(self):
+        """
+        Grid in its internal representation
+        """
+        return self.words
+
+    def to_bool(self, rows):
+        """
+        Unpacks (n, nwords) rows to (n, size) boolean array
+        """
+        return np.unpackbits(rows.view(np.uint8), axis=1, count=self.size,
+                             bitorder='little').view(bool)
+
+    def set_single_seed(self, j, v=True):
+        """
+        Sets value for single seed
+        """
+        w, b = divmod(j % self.size, 64)
+        if v:
+            self.words[0, w] |= self.one << np.uint64(b)
+        else:
+            self.words[0, w] &= ~(self.one << np.uint64(b))
+
+    def set_seed(self, seed):
+        """
+        Sets seed provided as string with length self.size
+        """
+        row = np.array([bool(int(v)) for v in seed])
+        packed = np.packbits(row, bitorder='little')
+        packed = np.pad(packed, (0, 8*self.nwords - len(packed)))
+        self.words[0] |= packed.view('<u8')
+
+    def shift(self, words):
+        """
+        Returns words with bit c holding cells c - 1 (left) and c + 1 (right),
+        carrying bits across words and wrapping around periodically
+        """
+        left = words << self.one
+        left[1:] |= words[:-1] >> self.msb
+        left[0] |= (words[-1] >> self.last_bit) & self.one
+
+        right = words >> self.one
+        right[:-1] |= words[1:] << self.msb
+        right[-1] |= (words[0] & self.one) << self.last_bit
+        return left, right
+
+    def step(self, center):
+        """
+        Returns packed row following packed row center
+        """
+        left, right = self.shift(center)
+        row = np.zeros(self.nwords, dtype='<u8')
+        # Sum of the minterms of the neighbourhoods mapped to True
+        for n in np.nonzero(self.pattern_map.ravel())[0]:
+            row |= ((left if n & 4 else ~left) & (center if n & 2 else ~center)
+                    & (right if n & 1 else ~right))
+        # Cells beyond self.size must stay empty
+        row[-1] &= np.uint64((1 << (int(self.last_bit) + 1)) - 1)
+        return row
+
+
 def run_ca(rule, size, time, random=False, ax=None):
     ca = ElementaryCA(rule, size, time)
     title = 'Rule {}'.format(rule)
@@ -111,22 +296,64 @@ def nice_examples(fout=None):
         fig.savefig(fout, dpi=300)
 
 
+def run_all_rules(size, time, random=False):
+    """
+    Runs the 256 rules at once, with the rules stacked as a (256, 8) lookup
+    table. Returns (256, time, size) boolean array
+    """
+    # table[rule, n] is the new state of the neighbourhood with index n
+    table = (np.arange(256)[:, None] >> np.arange(8)) & 1 == 1
+
+    grid = np.full((256, time, size), False)
+    if random:
+        grid[:, 0] = np.random.default_rng().random((256, size)) < 0.5
+    else:
+        grid[:, 0, min(time, size-1)] = True
+
+    for t in range(1, time):
+        row = grid[:, t-1].view(np.uint8)
+        index = 4*np.roll(row, 1, axis=1) + 2*row + np.roll(row, -1, axis=1)
+        grid[:, t] = np.take_along_axis(table, index, axis=1)
+    return grid
+
+
+def render_tiles(grids, ncols=16, pad=4, labels=True):
+    """
+    Tiles (n, time, size) grids into a single grayscale image (alive cells
+    are black) without matplotlib. If labels is True, writes the index of
+    each grid above it
+    """
+    n, time, size = grids.shape
+    nrows = -(-n // ncols)
+    label_height = 12 if labels else 0
+    tile_height = label_height + time + pad
+    tile_width = size + pad
+
+    img = np.full((nrows*tile_height + pad, ncols*tile_width + pad), 255, np.uint8)
+    for k in range(n):
+        i, j = divmod(k, ncols)
+        y = i*tile_height + pad + label_height
+        x = j*tile_width + pad
+        img[y:y+time, x:x+size] = np.where(grids[k], 0, 255)
+
+    img = Image.fromarray(img)
+    if labels:
+        draw = ImageDraw.Draw(img)
+        for k in range(n):
+            i, j = divmod(k, ncols)
+            draw.text((j*tile_width + pad, i*tile_height + pad), str(k), fill=0)
+    return img
+
+
 def generate_all_ca(random=True, fout=None):
     size = 129
     time = size
-    figsize = (30, 30)
     if not random:
         time //= 2
-        figsize = (30, 20)
-    fig, axes = plt.subplots(16, 16, figsize=figsize)
-    cyaxes = cycle(axes.ravel())
-    for i in range(256):
-        ax = next(cyaxes)
-        run_ca(i, size, time, random, ax)
-        ax.set_title(str(i))
-    fig.tight_layout()
+    img = render_tiles(run_all_rules(size, time, random))
     if fout is not None:
-        fig.savefig(fout, dpi=300)
+        img.save(fout)
+    return img
 
 
 if __name__ == '__main__':
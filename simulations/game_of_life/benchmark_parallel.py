@@ -0,0 +1,69 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from game_of_life import GameOfLife
+
+
+def time_steps(gol, nsteps):
+    # Time per step in seconds (first step is a warm-up)
+    gol.step()
+    t0 = time.perf_counter()
+    for _ in range(nsteps):
+        gol.step()
+    return (time.perf_counter() - t0) / nsteps
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare serial and parallel GameOfLife step times"
+    )
+    parser.add_argument(
+        "-s",
+        "--size",
+        type=int,
+        default=10000,
+        help="number of rows and columns of the board",
+    )
+    parser.add_argument(
+        "-n",
+        "--nsteps",
+        type=int,
+        default=10,
+        help="number of timed steps",
+    )
+    parser.add_argument(
+        "-w",
+        "--nworkers",
+        type=int,
+        nargs="+",
+        help="numbers of workers to benchmark. Default: powers of 2 up to the number of CPUs",
+    )
+    args = parser.parse_args()
+
+    nworkers = args.nworkers
+    if nworkers is None:
+        ncpus = os.cpu_count() or 1
+        nworkers = [2**i for i in range(ncpus.bit_length()) if 2**i <= ncpus]
+
+    rng = np.random.default_rng(0)
+    cells_init = rng.random((args.size, args.size)) < 0.3
+
+    gol = GameOfLife(args.size, args.size)
+    gol.initialize_cells(cells_init)
+    t_serial = time_steps(gol, args.nsteps)
+    print(f"{'engine':>10} {'workers':>8} {'s/step':>10} {'speedup':>8}")
+    print(f"{'serial':>10} {1:>8} {t_serial:>10.4f} {1:>8.2f}")
+
+    for n in nworkers:
+        gol = GameOfLife(args.size, args.size, engine="parallel", nworkers=n)
+        gol.initialize_cells(cells_init)
+        t = time_steps(gol, args.nsteps)
+        gol.close()
+        print(f"{'parallel':>10} {n:>8} {t:>10.4f} {t_serial / t:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
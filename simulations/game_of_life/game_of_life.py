@@ -1,16 +1,354 @@
 import argparse
+import hashlib
+import os
 import subprocess
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import colors
-from PIL import Image, ImageOps
+from PIL import GifImagePlugin, Image, ImageOps
+
+from hashlife import HashLife
+
+
+def next_generation(cells_padded):
+    """
+    Compute next generation of a block of cells surrounded by a halo.
+
+    Parameters
+    ----------
+    cells_padded: numpy.ndarray shape(nrows + 2, ncols + 2)
+        Cells with one extra row/column on each side. The halo is only used
+        for counting neighbours.
+
+    Returns
+    -------
+    cells: numpy.ndarray shape(nrows, ncols)
+        Next generation of the inner (non-halo) cells.
+    """
+    nrows, ncols = cells_padded.shape[0] - 2, cells_padded.shape[1] - 2
+    padded = cells_padded.view(np.uint8)
+
+    # Sum of the 8 shifted copies of the board
+    nalive = np.zeros((nrows, ncols), dtype=np.uint8)
+    for di in range(3):
+        for dj in range(3):
+            if di != 1 or dj != 1:
+                nalive += padded[di : di + nrows, dj : dj + ncols]
+
+    # Dead cells with exactly 3 alive neighbours are born, alive cells with
+    # 2 or 3 alive neighbours survive
+    return (nalive == 3) | ((nalive == 2) & cells_padded[1:-1, 1:-1])
+
+
+def pack_cells(cells):
+    """
+    Pack boolean cells into 64-bit words along the columns.
+
+    Parameters
+    ----------
+    cells: numpy.ndarray shape(nrows, ncols)
+        Boolean cells.
+
+    Returns
+    -------
+    words: numpy.ndarray shape(nrows, ceil(ncols/64))
+        Little-endian uint64 words. Bit b of word w holds column 64*w + b.
+        Bits beyond the last column are zero.
+    """
+    nbytes = cells.shape[1] // 8 + (cells.shape[1] % 8 > 0)
+    packed = np.packbits(cells, axis=1, bitorder="little")
+    packed = np.pad(packed, ((0, 0), (0, -nbytes % 8)))
+    return np.ascontiguousarray(packed).view("<u8")
+
+
+def unpack_cells(words, ncols):
+    """
+    Unpack 64-bit words created by pack_cells into boolean cells.
+
+    Parameters
+    ----------
+    words: numpy.ndarray shape(nrows, nwords)
+        Packed cells.
+    ncols: int
+        Number of columns.
+
+    Returns
+    -------
+    cells: numpy.ndarray shape(nrows, ncols)
+        Boolean cells.
+    """
+    return np.unpackbits(
+        words.view(np.uint8), axis=1, count=ncols, bitorder="little"
+    ).view(bool)
+
+
+def next_generation_packed(words, ncols):
+    """
+    Compute next generation of bit-packed cells (see pack_cells).
+
+    The 8 neighbours of each cell are added by a bit-sliced adder network,
+    so each bitwise operation processes 64 cells at once.
+
+    Parameters
+    ----------
+    words: numpy.ndarray shape(nrows, nwords)
+        Packed cells.
+    ncols: int
+        Number of columns.
+
+    Returns
+    -------
+    words: numpy.ndarray shape(nrows, nwords)
+        Packed cells of the next generation.
+    """
+    one, msb = np.uint64(1), np.uint64(63)
+
+    # Bit c of west (east) holds column c - 1 (c + 1), carrying across words
+    west = words << one
+    west[:, 1:] |= words[:, :-1] >> msb
+    east = words >> one
+    east[:, :-1] |= words[:, 1:] << msb
+
+    def shift_rows(a, k):
+        # Row i of the output holds row i - k of a (zero outside the board)
+        out = np.zeros_like(a)
+        if k > 0:
+            out[k:] = a[:-k]
+        else:
+            out[:k] = a[-k:]
+        return out
+
+    neighbours = [west, east]
+    for k in (1, -1):
+        neighbours += [shift_rows(west, k), shift_rows(words, k), shift_rows(east, k)]
+
+    # 3-bit counter (s2, s1, s0). A count of 8 wraps to 0, which does not
+    # matter because only counts of 2 and 3 are relevant
+    s0, s1, s2 = np.zeros_like(words), np.zeros_like(words), np.zeros_like(words)
+    for n in neighbours:
+        c0 = s0 & n
+        s0 ^= n
+        c1 = s1 & c0
+        s1 ^= c0
+        s2 ^= c1
+
+    # Born with 3 alive neighbours (s0 = s1 = 1), survives with 2 or 3 (s1 = 1)
+    words = s1 & ~s2 & (s0 | words)
+
+    # Cells beyond the last column must stay dead
+    if ncols % 64:
+        words[:, -1] &= np.uint64((1 << (ncols % 64)) - 1)
+
+    return words
+
+
+def colorize_cells(cells, color_dead=(1, 1, 1), color_alive=(0, 0, 0)):
+    """
+    Convert cells to RGB image.
+
+    Parameters
+    ----------
+    cells: numpy.ndarray shape(nrows, ncols)
+        Boolean cells.
+    color_dead: tuple (optional)
+        RGB color (values from 0 to 1) of the dead cells.
+        Default: (1, 1, 1)
+    color_alive: tuple (optional)
+        RGB color (values from 0 to 1) of the alive cells.
+        Default: (0, 0, 0)
+
+    Returns
+    -------
+    color_data: numpy.ndarray shape(nrows, ncols, 3)
+        uint8 RGB image.
+    """
+    color_data = np.ones((*cells.shape, 3))
+    color_data[~cells] *= np.array(color_dead)
+    color_data[cells] *= np.array(color_alive)
+    return (color_data * 255).astype(np.uint8)
+
+
+def write_gif(fout, frames, palette, duration=80, cycle=False, scale=1):
+    """
+    Write animated gif frame by frame, keeping only one raw frame in memory.
+
+    Parameters
+    ----------
+    fout: str
+        Output file name.
+    frames: iterable of numpy.ndarray shape(nrows, ncols, 3)
+        uint8 RGB frames. All frames must have the same shape.
+    palette: numpy.ndarray shape(ncolors, 3)
+        uint8 RGB colors used in the frames (at most 256). Pixels of any
+        other color are written with the first color.
+    duration: float (optional)
+        Duration (in milliseconds) of each frame.
+        Default: 80
+    cycle: bool (optional)
+        If True, appends the frames backwards (patrol-cycle). The compressed
+        frames are kept in memory for that.
+        Default: False
+    scale: int (optional)
+        Size (in pixels) of each cell.
+        Default: 1
+    """
+    palette_image = Image.new("P", (1, 1))
+    palette_image.putpalette(np.asarray(palette, dtype=np.uint8).ravel().tolist())
+
+    def to_image(frame):
+        indices = np.zeros(frame.shape[:2], dtype=np.uint8)
+        for i, color in enumerate(palette):
+            indices[np.all(frame == color, axis=-1)] = i
+        img = Image.fromarray(indices, mode="P")
+        img.putpalette(palette_image.getpalette())
+        if scale != 1:
+            img = img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+        return img
+
+    encoded = []
+    with open(fout, "wb") as fp:
+        for i, frame in enumerate(frames):
+            img = to_image(frame)
+            if i == 0:
+                header, _ = GifImagePlugin.getheader(
+                    img, info=dict(loop=0, optimize=False, duration=duration)
+                )
+                fp.write(b"".join(header))
+            data = b"".join(GifImagePlugin.getdata(img, duration=duration))
+            fp.write(data)
+            if cycle:
+                encoded.append(data)
+
+        # Same frames as 'convert -duplicate 1,-2-1': backwards, without
+        # repeating the last and first frames
+        for data in encoded[-2:0:-1]:
+            fp.write(data)
+
+        fp.write(b";")
+
+
+# Shared memory buffers attached by each worker of ParallelStepper
+_worker_shms = []
+_worker_buffers = []
+
+
+def _attach_buffers(names, shape):
+    for name in names:
+        shm = SharedMemory(name=name)
+        _worker_shms.append(shm)
+        _worker_buffers.append(np.ndarray(shape, dtype=bool, buffer=shm.buf))
+
+
+def _step_band(src, r0, r1):
+    # Rows r0 to r1 (exclusive) of the board are rows r0 + 1 to r1 + 1 of the
+    # padded buffers. Rows r0 and r1 + 1 are the halo
+    cells, cells_ = _worker_buffers[src], _worker_buffers[1 - src]
+    cells_[r0 + 1 : r1 + 1, 1:-1] = next_generation(cells[r0 : r1 + 2])
+
+
+def _release(pool, shms):
+    pool.terminate()
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+
+class ParallelStepper(object):
+    def __init__(self, nrows, ncols, nworkers=None):
+        """
+        Compute Game of Life steps on a pool of processes. The board is split
+        into row bands, one per worker, and kept in two padded buffers in
+        shared memory (current and next generation), so no copies of the
+        board are exchanged between processes.
+
+        Parameters
+        ----------
+        nrows: int
+            Number of rows.
+        ncols: int
+            Number of columns.
+        nworkers: int (optional)
+            Number of worker processes. If None is provided, uses the number
+            of CPUs.
+            Default: None
+        """
+        self.nworkers = nworkers or os.cpu_count()
+
+        shape = (nrows + 2, ncols + 2)
+        self._shms = [
+            SharedMemory(create=True, size=shape[0] * shape[1]) for _ in range(2)
+        ]
+        self.buffers = [
+            np.ndarray(shape, dtype=bool, buffer=shm.buf) for shm in self._shms
+        ]
+        for buffer in self.buffers:
+            buffer[:] = False
+        self.current = 0
+
+        bounds = np.linspace(0, nrows, self.nworkers + 1).astype(int)
+        self.bands = [(r0, r1) for r0, r1 in zip(bounds[:-1], bounds[1:]) if r1 > r0]
+
+        self._pool = Pool(
+            self.nworkers,
+            initializer=_attach_buffers,
+            initargs=([shm.name for shm in self._shms], shape),
+        )
+        self._finalizer = weakref.finalize(self, _release, self._pool, self._shms)
+
+    @property
+    def cells(self):
+        """
+        View of the current cells in shared memory. It is overwritten by the
+        next-but-one step, copy it if it has to be kept.
+        """
+        return self.buffers[self.current][1:-1, 1:-1]
+
+    @cells.setter
+    def cells(self, cells):
+        self.buffers[self.current][1:-1, 1:-1] = cells
+
+    def step(self):
+        """
+        Compute cellular automaton step.
+        """
+        self._pool.starmap(_step_band, [(self.current, *band) for band in self.bands])
+        self.current = 1 - self.current
+
+    def close(self):
+        """
+        Terminate worker processes and release shared memory.
+        """
+        self._finalizer()
+
+
+@dataclass
+class StepStats:
+    active_tiles: int
+    total_tiles: int
+    cells_updated: int
+
+
+@dataclass
+class CycleInfo:
+    # Generation in which the cycle starts and number of generations in the
+    # cycle (1 for still lifes)
+    transient: int
+    period: int
 
 
 class GameOfLife(object):
-    def __init__(self, nrows, ncols):
+    engines = ("loop", "vectorized", "bitpacked", "tiled", "parallel")
+
+    def __init__(self, nrows, ncols, engine="vectorized", tile_size=64, nworkers=None):
         """
         Initialize empty Game of Life with a nrows by ncols grid.
 
@@ -20,13 +358,96 @@ class GameOfLife(object):
             Number of rows.
         ncols: int
             Number of columns.
+        engine: str (optional)
+            Engine used to compute each step. "loop" visits every cell in
+            Python, "vectorized" counts the neighbours of the whole board at
+            once using shifted array sums, and "bitpacked" stores 64 cells per
+            uint64 word (8x less memory than bool) and updates them with
+            bitwise operations. "tiled" splits the board into tiles and only
+            recomputes the tiles that changed, or had a neighbouring tile
+            changed, in the previous step. "parallel" steps bands of rows on
+            a pool of processes sharing the board in shared memory (see
+            ParallelStepper). All engines give identical results.
+            Default: "vectorized"
+        tile_size: int (optional)
+            Size (in cells) of the square tiles used by the "tiled" engine.
+            Default: 64
+        nworkers: int (optional)
+            Number of processes used by the "parallel" engine. If None is
+            provided, uses the number of CPUs.
+            Default: None
         """
+        if engine not in self.engines:
+            raise ValueError(f"Unrecognized engine {engine}")
+
         self.nrows = nrows
         self.ncols = ncols
+        self.engine = engine
+        self.hashlife = None
+
+        self.tile_size = tile_size
+        self.ntiles = (-(-nrows // tile_size), -(-ncols // tile_size))
+        # Statistics of the last step computed by the "tiled" engine
+        self.step_stats = None
+
+        self.parallel = None
+        if engine == "parallel":
+            self.parallel = ParallelStepper(nrows, ncols, nworkers)
 
         self.cells_init = self.cells_template()
         self.cells = self.cells_template()
 
+    @property
+    def cells(self):
+        """
+        Current cells as boolean numpy.ndarray shape(nrows, ncols).
+
+        With the "bitpacked" engine, the array is an unpacked copy, and with
+        the "tiled" engine, in-place changes would not activate their tiles,
+        so it is read-only: changes must be assigned to cells (or made with
+        initialize_cells).
+        """
+        if self.engine == "bitpacked":
+            cells = unpack_cells(self._cells, self.ncols)
+        elif self.engine == "tiled":
+            cells = self._cells.view()
+        elif self.engine == "parallel":
+            return self.parallel.cells
+        else:
+            return self._cells
+        cells.flags.writeable = False
+        return cells
+
+    @cells.setter
+    def cells(self, cells):
+        if self.engine == "bitpacked":
+            cells = pack_cells(cells)
+        elif self.engine == "parallel":
+            self.parallel.cells = cells
+            return
+        elif self.engine == "tiled":
+            # Cells were modified externally, so every tile has to be updated
+            self._active_tiles = np.full(self.ntiles, True)
+        self._cells = cells
+
+    @property
+    def cells_init(self):
+        """
+        Initial cells as boolean numpy.ndarray shape(nrows, ncols).
+        Read-only with the "bitpacked" engine (see cells).
+        """
+        if self.engine == "bitpacked":
+            cells = unpack_cells(self._cells_init, self.ncols)
+            cells.flags.writeable = False
+            return cells
+        return self._cells_init
+
+    @cells_init.setter
+    def cells_init(self, cells):
+        if self.engine == "bitpacked":
+            cells = pack_cells(cells)
+        self._cells_init = cells
+
     def cells_template(self):
         """
         Initialize empty cells template.
@@ -47,7 +468,7 @@ class GameOfLife(object):
         cells_init: numpy.ndarray shape(nrows, ncols)
             Initial cells configuration.
         """
-        if self.cells.shape == cells_init.shape:
+        if (self.nrows, self.ncols) == cells_init.shape:
             self.cells_init = cells_init.copy()
             self.cells = cells_init.copy()
         else:
@@ -75,6 +496,81 @@ class GameOfLife(object):
         """
         Compute cellular automaton step.
         """
+        if self.engine == "loop":
+            self.step_loop()
+        elif self.engine == "bitpacked":
+            self.step_bitpacked()
+        elif self.engine == "tiled":
+            self.step_tiled()
+        elif self.engine == "parallel":
+            self.parallel.step()
+        else:
+            self.step_vectorized()
+
+    def step_bitpacked(self):
+        """
+        Compute cellular automaton step on the bit-packed cells.
+        """
+        self._cells = next_generation_packed(self._cells, self.ncols)
+
+    def step_vectorized(self):
+        """
+        Compute cellular automaton step for the whole board at once.
+        """
+        # Cells outside the board are considered to be dead
+        self.cells = next_generation(np.pad(self.cells, 1))
+
+    def close(self):
+        """
+        Release the worker processes and shared memory of the "parallel"
+        engine. Does nothing for the other engines.
+        """
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def step_tiled(self):
+        """
+        Compute cellular automaton step only for the active tiles.
+
+        A tile can only change if itself or one of its 8 neighbouring tiles
+        changed in the previous step. Statistics of the step are stored in
+        self.step_stats.
+        """
+        ts = self.tile_size
+        padded = np.pad(self._cells, 1)
+        cells_ = self._cells.copy()
+        changed = np.full(self.ntiles, False)
+        cells_updated = 0
+
+        for ti, tj in zip(*np.nonzero(self._active_tiles)):
+            r0, c0 = ti * ts, tj * ts
+            r1, c1 = min(r0 + ts, self.nrows), min(c0 + ts, self.ncols)
+            block = next_generation(padded[r0 : r1 + 2, c0 : c1 + 2])
+            cells_updated += block.size
+            if np.any(block != self._cells[r0:r1, c0:c1]):
+                cells_[r0:r1, c0:c1] = block
+                changed[ti, tj] = True
+
+        self.step_stats = StepStats(
+            active_tiles=int(np.count_nonzero(self._active_tiles)),
+            total_tiles=self._active_tiles.size,
+            cells_updated=cells_updated,
+        )
+
+        # Tiles active in the next step: changed tiles and their neighbours
+        changed = np.pad(changed, 1)
+        active = np.full(self.ntiles, False)
+        for di in range(3):
+            for dj in range(3):
+                active |= changed[di : di + self.ntiles[0], dj : dj + self.ntiles[1]]
+
+        self._cells = cells_
+        self._active_tiles = active
+
+    def step_loop(self):
+        """
+        Compute cellular automaton step cell by cell.
+        """
         cells_ = self.cells.copy()
 
         for i in range(self.nrows):
@@ -97,8 +593,117 @@ class GameOfLife(object):
 
         self.cells = cells_
 
+    def state_hash(self):
+        """
+        Hash of the current cells.
+
+        Returns
+        -------
+        digest: bytes
+            128-bit blake2b digest of the bit-packed cells.
+        """
+        if self.engine == "bitpacked":
+            packed = self._cells
+        else:
+            packed = np.packbits(self.cells)
+        return hashlib.blake2b(packed.tobytes(), digest_size=16).digest()
+
+    def run(self, ngenerations, history_size=1024, callback=None):
+        """
+        Compute up to ngenerations steps, stopping early once the cells
+        repeat a previous state (i.e., become static or periodic).
+
+        The hashes of the last history_size generations are kept in memory,
+        so cycles with a period longer than history_size are not detected.
+
+        Parameters
+        ----------
+        ngenerations: int
+            Maximum number of steps.
+        history_size: int (optional)
+            Maximum number of generation hashes kept in memory.
+            Default: 1024
+        callback: callable (optional)
+            Function called with the GameOfLife instance after each step.
+            Default: None
+
+        Returns
+        -------
+        cycle: CycleInfo or None
+            Transient length and period of the cycle, counted from the cells
+            at the moment run is called. None if no cycle is detected.
+        """
+        history = OrderedDict([(self.state_hash(), 0)])
+
+        for generation in range(1, ngenerations + 1):
+            self.step()
+            if callback is not None:
+                callback(self)
+            digest = self.state_hash()
+            if digest in history:
+                transient = history[digest]
+                return CycleInfo(transient=transient, period=generation - transient)
+            history[digest] = generation
+            if len(history) > history_size:
+                history.popitem(last=False)
+
+        return None
+
+    def cycle_nframes(self, nframes, freezeframes=0, max_generations=1000):
+        """
+        Number of frames needed to show every distinct state of the cells,
+        starting from the current cells, which are left unchanged.
+
+        Parameters
+        ----------
+        nframes: int or None
+            Number of frames requested. Cycles are searched up to this number
+            of frames. If None is provided, up to max_generations.
+        freezeframes: int (optional)
+            Number of frozen frames at beginning of animation.
+            Default: 0
+        max_generations: int (optional)
+            Maximum number of generations searched if nframes is None.
+            Default: 1000
+
+        Returns
+        -------
+        nframes: int or None
+            Frames up to the end of the first cycle, or the input nframes if
+            no cycle is detected.
+        """
+        ngenerations = max_generations if nframes is None else nframes - freezeframes
+        cells = self.cells.copy()
+        cycle = self.run(max(ngenerations, 0))
+        self.cells = cells
+
+        if cycle is None:
+            return nframes
+        cut = freezeframes + cycle.transient + cycle.period
+        return cut if nframes is None else min(nframes, cut)
+
+    def advance(self, n_generations):
+        """
+        Advance cells by n_generations using HashLife.
+
+        HashLife evolves the pattern on an unbounded plane, so, unlike step,
+        cells that leave the board keep interacting with the pattern until
+        the result is cropped back to the board. The node cache is kept in
+        self.hashlife between calls.
+
+        Parameters
+        ----------
+        n_generations: int
+            Number of generations.
+        """
+        if self.hashlife is None:
+            self.hashlife = HashLife()
+        node = self.hashlife.from_array(self.cells)
+        node = self.hashlife.advance(node, n_generations)
+        self.cells = self.hashlife.to_array(node, self.nrows, self.ncols)
+
     @staticmethod
-    def from_image(fname, threshold=128):
+    def from_image(fname, threshold=128, **kwargs):
         """
         Static method. Initialize game of live from image.
 
@@ -111,6 +716,8 @@ class GameOfLife(object):
             White pixels are considered to be alive cells, while black pixels
             are dead cells.
             Default: 128
+        **kwargs:
+            Extra keyword arguments passed to GameOfLife (e.g., engine)
 
         Returns
         -------
@@ -123,11 +730,128 @@ class GameOfLife(object):
         cells_init = np.full(arr.shape, False)
         cells_init[arr < threshold] = True
 
-        gol = GameOfLife(*cells_init.shape)
+        gol = GameOfLife(*cells_init.shape, **kwargs)
         gol.initialize_cells(cells_init)
 
         return gol
 
+    def frames(
+        self,
+        nframes,
+        freezeframes=0,
+        color_dead="white",
+        color_alive="black",
+    ):
+        """
+        Generator of colorized frames, starting from the current cells. Same
+        frames as in animate.
+
+        Parameters
+        ----------
+        nframes: int
+            Number of frames.
+        freezeframes: int (optional)
+            Number of frozen frames at beginning of animation.
+            Default: 0
+        color_dead: list or str (optional)
+            Color of the dead cells as RGB colors (values from 0 to 1), color
+            name, or hex code
+            Default: white
+        color_alive: list or str (optional)
+            Color of the alive cells as RGB colors (values from 0 to 1), color
+            name, or hex code
+            Default: black
+
+        Yields
+        ------
+        frame: numpy.ndarray shape(nrows, ncols, 3)
+            uint8 RGB frame.
+        """
+        color_dead = colors.to_rgb(color_dead)
+        color_alive = colors.to_rgb(color_alive)
+
+        for i in range(nframes):
+            if i > freezeframes:
+                self.step()
+            yield colorize_cells(self.cells, color_dead, color_alive)
+
+    def export(
+        self,
+        save,
+        cycle=False,
+        nframes=100,
+        freezeframes=0,
+        interval=80,
+        scale=1,
+        color_dead="white",
+        color_alive="black",
+        detect_cycles=False,
+    ):
+        """
+        Save animation without matplotlib. Frames are generated and encoded
+        one at a time, so memory usage does not grow with nframes.
+
+        Parameters
+        ----------
+        save: str
+            Output file name. Gif files are streamed to disk. Other formats
+            supported by PIL (e.g., apng with the .png extension) are written
+            by PIL, which keeps all frames in memory.
+        cycle: bool (optional)
+            If True, animates as patrol-cycle (forwards, then backwards).
+            Default: False
+        nframes: int (optional)
+            Number of frames (of the forwards part).
+            Default: 100
+        freezeframes: int (optional)
+            Number of frozen frames at beginning of animation.
+            Default: 0
+        interval: float (optional)
+            Interval (in milliseconds) between frames.
+            Default: 80
+        scale: int (optional)
+            Size (in pixels) of each cell.
+            Default: 1
+        color_dead: list or str (optional)
+            Color of the dead cells as RGB colors (values from 0 to 1), color
+            name, or hex code
+            Default: white
+        color_alive: list or str (optional)
+            Color of the alive cells as RGB colors (values from 0 to 1), color
+            name, or hex code
+            Default: black
+        detect_cycles: bool (optional)
+            If True, stops the animation once the cells become static or
+            periodic (see cycle_nframes).
+            Default: False
+        """
+        if detect_cycles:
+            nframes = self.cycle_nframes(nframes, freezeframes)
+
+        frames = self.frames(nframes, freezeframes, color_dead, color_alive)
+
+        if Path(save).suffix.lower() == ".gif":
+            palette = colorize_cells(
+                np.array([False, True]),
+                colors.to_rgb(color_dead),
+                colors.to_rgb(color_alive),
+            )
+            write_gif(save, frames, palette, interval, cycle, scale)
+            return
+
+        def to_image(frame):
+            img = Image.fromarray(frame)
+            if scale != 1:
+                img = img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+            return img
+
+        images = [to_image(frame) for frame in frames]
+        if cycle:
+            images += images[-2:0:-1]
+        images[0].save(
+            save, save_all=True, append_images=images[1:], duration=interval, loop=0
+        )
+
     def animate(
         self,
         save=None,
@@ -138,6 +862,7 @@ class GameOfLife(object):
         dpi=90,
         color_dead="white",
         color_alive="black",
+        detect_cycles=False,
     ):
         """
         Animate Game of Life
@@ -172,8 +897,16 @@ class GameOfLife(object):
             Color of the alive cells as RGB colors (values from 0 to 1), color
             name, or hex code
             Default: black
+        detect_cycles: bool (optional)
+            If True, cuts nframes once the cells become static or periodic
+            (see cycle_nframes). If nframes is None, cycles are searched in
+            the first 1000 generations.
+            Default: False
         """
-        figsize = np.array(self.cells.shape[::-1])
+        if detect_cycles:
+            nframes = self.cycle_nframes(nframes, freezeframes)
+
+        figsize = np.array([self.ncols, self.nrows])
         figsize = figsize * 10 / figsize.max()
 
         fig, ax = plt.subplots(figsize=figsize)
@@ -182,13 +915,7 @@ class GameOfLife(object):
         color_dead = colors.to_rgb(color_dead)
         color_alive = colors.to_rgb(color_alive)
 
-        def colorize_cells(cells):
-            color_data = np.ones((*cells.shape, 3))
-            color_data[~self.cells] *= np.array(color_dead)
-            color_data[self.cells] *= np.array(color_alive)
-            return (color_data * 255).astype(np.uint8)
-
-        img = ax.imshow(colorize_cells(self.cells))
+        img = ax.imshow(colorize_cells(self.cells, color_dead, color_alive))
         cells_init = self.cells.copy()
 
         def func(*args):
@@ -197,7 +924,7 @@ class GameOfLife(object):
                     self.cells = cells_init
             else:
                 self.step()
-            img.set_data(colorize_cells(self.cells))
+            img.set_data(colorize_cells(self.cells, color_dead, color_alive))
             return (img,)
 
         kwargs = dict(fig=fig, func=func, blit=True, interval=interval)
@@ -232,6 +959,186 @@ class GameOfLife(object):
         return ani
 
 
+@dataclass
+class BatchResult:
+    fname: str
+    nrows: int
+    ncols: int
+    generations: int
+    population_init: int
+    population_final: int
+    transient: int = -1  # -1 if no cycle was detected
+    period: int = -1
+    elapsed: float = 0.0
+
+
+def run_seed(
+    fname,
+    output,
+    nsteps,
+    engine="vectorized",
+    detect_cycles=False,
+    gif=False,
+    color_dead="white",
+    color_alive="black",
+):
+    """
+    Run Game of Life seeded by an image without any GUI and write the final
+    board (<stem>_final.png), the population curve (<stem>_population.csv)
+    and, optionally, the animation (<stem>.gif) to the output directory.
+
+    Parameters
+    ----------
+    fname: str
+        Image file name.
+    output: str
+        Output directory.
+    nsteps: int
+        Number of steps.
+    engine: str (optional)
+        GameOfLife engine. The "parallel" engine cannot be used in a worker.
+        Default: "vectorized"
+    detect_cycles: bool (optional)
+        If True, stops once the cells become static or periodic.
+        Default: False
+    gif: bool (optional)
+        If True, also writes the animation from the initial cells.
+        Default: False
+    color_dead: list or str (optional)
+        Color of the dead cells in the gif.
+        Default: white
+    color_alive: list or str (optional)
+        Color of the alive cells in the gif.
+        Default: black
+
+    Returns
+    -------
+    result: BatchResult
+        Summary of the run.
+    """
+    t0 = time.perf_counter()
+    stem = Path(output) / Path(fname).stem
+
+    gol = GameOfLife.from_image(fname, engine=engine)
+    population = [np.count_nonzero(gol.cells)]
+
+    def record(gol):
+        population.append(np.count_nonzero(gol.cells))
+
+    cycle = None
+    if detect_cycles:
+        cycle = gol.run(nsteps, callback=record)
+    else:
+        for _ in range(nsteps):
+            gol.step()
+            record(gol)
+
+    # Alive cells are black, as in the input images
+    Image.fromarray(~gol.cells).save(stem.with_name(stem.name + "_final.png"))
+    np.savetxt(
+        stem.with_name(stem.name + "_population.csv"),
+        np.column_stack([np.arange(len(population)), population]),
+        fmt="%d",
+        delimiter=",",
+        header="generation,population",
+        comments="",
+    )
+
+    if gif:
+        gol.cells = gol.cells_init
+        gol.export(
+            stem.with_suffix(".gif"),
+            nframes=len(population),
+            color_dead=color_dead,
+            color_alive=color_alive,
+        )
+
+    return BatchResult(
+        fname=str(fname),
+        nrows=gol.nrows,
+        ncols=gol.ncols,
+        generations=len(population) - 1,
+        population_init=population[0],
+        population_final=population[-1],
+        transient=-1 if cycle is None else cycle.transient,
+        period=-1 if cycle is None else cycle.period,
+        elapsed=time.perf_counter() - t0,
+    )
+
+
+def _run_seed(kwargs):
+    return run_seed(**kwargs)
+
+
+def run_batch(directory, output=None, nsteps=100, nworkers=None, **kwargs):
+    """
+    Run headless Game of Life for every image in a directory on a pool of
+    processes (see run_seed). A summary of all runs is written to
+    summary.csv in the output directory.
+
+    Parameters
+    ----------
+    directory: str
+        Directory with the seed images.
+    output: str (optional)
+        Output directory. If None is provided, uses <directory>/gol_output.
+        Default: None
+    nsteps: int (optional)
+        Number of steps for each image.
+        Default: 100
+    nworkers: int (optional)
+        Number of worker processes. If None is provided, uses the number of
+        CPUs.
+        Default: None
+    **kwargs:
+        Extra keyword arguments passed to run_seed.
+
+    Returns
+    -------
+    results: list of BatchResult
+        Summary of each run, in the order the images were found.
+    """
+    if kwargs.get("engine") == "parallel":
+        raise ValueError("The parallel engine cannot be used in batch mode")
+
+    extensions = Image.registered_extensions()
+    fnames = sorted(
+        f for f in Path(directory).iterdir() if f.suffix.lower() in extensions
+    )
+    output = Path(directory) / "gol_output" if output is None else Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    tasks = [dict(fname=f, output=output, nsteps=nsteps, **kwargs) for f in fnames]
+    results = {}
+    t0 = time.perf_counter()
+    with Pool(nworkers) as pool:
+        for result in pool.imap_unordered(_run_seed, tasks):
+            results[result.fname] = result
+            print(
+                f"[{len(results)}/{len(tasks)}] {result.fname}: "
+                f"{result.generations} generations, "
+                f"population {result.population_init} -> {result.population_final} "
+                f"({result.elapsed:.2f} s)"
+            )
+    elapsed = time.perf_counter() - t0
+    results = [results[str(f)] for f in fnames]
+
+    with open(output / "summary.csv", "w") as f:
+        f.write(",".join(BatchResult.__dataclass_fields__) + "\n")
+        for result in results:
+            f.write(",".join(str(v) for v in vars(result).values()) + "\n")
+
+    ncycles = sum(result.period > 0 for result in results)
+    print(
+        f"Processed {len(results)} images in {elapsed:.2f} s "
+        f"({len(results) / max(elapsed, 1e-9):.2f} images/s). "
+        f"{ncycles} reached a static or periodic state. "
+        f"Outputs written to {output}"
+    )
+
+    return results
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -299,10 +1206,95 @@ if __name__ == "__main__":
         default="black",
         help="color of the alive cells as hex code or color name",
     )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        default="vectorized",
+        choices=GameOfLife.engines,
+        help="engine used to compute each step",
+    )
+    parser.add_argument(
+        "-x",
+        "--headless",
+        action="store_true",
+        help="write the animation directly from the cells, without matplotlib (requires --save)",
+    )
+    parser.add_argument(
+        "-p",
+        "--pixels",
+        type=int,
+        default=1,
+        help="size in pixels of each cell in headless mode",
+    )
+    parser.add_argument(
+        "-k",
+        "--detect_cycles",
+        action="store_true",
+        help="stop the animation once the cells become static or periodic",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        metavar="DIR",
+        help="run without GUI for every image in DIR on a pool of processes",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="DIR",
+        help="output directory of batch mode. Default: DIR/gol_output",
+    )
+    parser.add_argument(
+        "--nsteps",
+        type=int,
+        default=100,
+        help="number of steps per image in batch mode",
+    )
+    parser.add_argument(
+        "-w",
+        "--nworkers",
+        type=int,
+        help="number of processes in batch mode. Default: number of CPUs",
+    )
+    parser.add_argument(
+        "--gif",
+        action="store_true",
+        help="also write the animation of each image in batch mode",
+    )
     args = parser.parse_args()
 
+    if args.batch is not None:
+        run_batch(
+            args.batch,
+            args.output,
+            args.nsteps,
+            args.nworkers,
+            engine=args.engine,
+            detect_cycles=args.detect_cycles,
+            gif=args.gif,
+            color_dead=args.color_dead,
+            color_alive=args.color_alive,
+        )
+        parser.exit()
+
+    if args.headless and args.save is None:
+        parser.error("--headless requires --save")
+
+    def export(gol, save):
+        gol.export(
+            save,
+            args.cycle,
+            args.nframes or 100,
+            args.freezeframes,
+            args.interval,
+            args.pixels,
+            args.color_dead,
+            args.color_alive,
+            args.detect_cycles,
+        )
+
     if len(args.fname) == 0:
-        gol = GameOfLife(14, 38)
+        gol = GameOfLife(14, 38, engine=args.engine)
 
         cells_init = gol.cells_template()
         cells_init[5 : 5 + 2, 1 : 1 + 2] = True
@@ -325,21 +1317,28 @@ if __name__ == "__main__":
         gol.initialize_cells(cells_init)
 
         save = "glider.gif" if args.save == "?" else args.save
-        ani = gol.animate(
-            save,
-            args.cycle,
-            args.nframes,
-            args.freezeframes,
-            args.interval,
-            args.dpi,
-        )
+        if args.headless:
+            export(gol, save)
+        else:
+            ani = gol.animate(
+                save,
+                args.cycle,
+                args.nframes,
+                args.freezeframes,
+                args.interval,
+                args.dpi,
+                detect_cycles=args.detect_cycles,
+            )
 
-        if args.quiet:
-            plt.show()
+            if args.quiet:
+                plt.show()
 
     for fname in args.fname:
         save = Path(fname).with_suffix(".gif") if args.save == "?" else args.save
-        gol = GameOfLife.from_image(fname)
+        gol = GameOfLife.from_image(fname, engine=args.engine)
+        if args.headless:
+            export(gol, save)
+            continue
         ani = gol.animate(
             save,
             args.cycle,
@@ -349,7 +1348,8 @@ if __name__ == "__main__":
             args.dpi,
             args.color_dead,
             args.color_alive,
+            args.detect_cycles,
         )
 
-    if not args.quiet:
+    if not args.quiet and not args.headless:
         plt.show()
@@ -0,0 +1,306 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class Node(object):
+    """
+    Quadtree node. A node of level k represents a 2^k by 2^k square of cells
+    composed by four nodes of level k - 1 (nw, ne, sw, se). Nodes of level 0
+    are single cells.
+    """
+
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+
+class HashLife(object):
+    def __init__(self, max_nodes=2**20):
+        """
+        HashLife engine. Computes Game of Life generations on an unbounded
+        plane using a memoized quadtree, so that regular patterns can be
+        advanced by millions of generations.
+
+        Nodes are canonical (identical squares share the same node) through a
+        cache of at most max_nodes entries, evicting the least recently used
+        ones. Evicted nodes are still valid, they only stop being shared.
+
+        Parameters
+        ----------
+        max_nodes: int (optional)
+            Maximum number of entries in the node cache and in the cache of
+            computed successors.
+            Default: 2**20
+        """
+        self.max_nodes = max_nodes
+
+        self.off = Node(0, None, None, None, None, 0)
+        self.on = Node(0, None, None, None, None, 1)
+
+        self._nodes = OrderedDict()
+        self._successors = OrderedDict()
+        self._zeros = [self.off]
+
+    def clear(self):
+        """
+        Clear node and successor caches.
+        """
+        self._nodes.clear()
+        self._successors.clear()
+        self._zeros = [self.off]
+
+    def join(self, nw, ne, sw, se):
+        """
+        Get canonical node composed by four nodes of the same level.
+        """
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is not None:
+            self._nodes.move_to_end(key)
+            return node
+
+        population = nw.population + ne.population + sw.population + se.population
+        node = Node(nw.level + 1, nw, ne, sw, se, population)
+        self._nodes[key] = node
+        if len(self._nodes) > self.max_nodes:
+            self._nodes.popitem(last=False)
+        return node
+
+    def zero(self, level):
+        """
+        Get empty node of a given level.
+        """
+        while len(self._zeros) <= level:
+            z = self._zeros[-1]
+            self._zeros.append(self.join(z, z, z, z))
+        return self._zeros[level]
+
+    def centre(self, node):
+        """
+        Get node one level higher with node at its centre and empty borders.
+        """
+        z = self.zero(node.level - 1)
+        return self.join(
+            self.join(z, z, z, node.nw),
+            self.join(z, z, node.ne, z),
+            self.join(z, node.sw, z, z),
+            self.join(node.se, z, z, z),
+        )
+
+    def _life_4x4(self, node):
+        """
+        Advance the centre 2x2 cells of a level 2 node by one generation.
+        """
+        n = node
+        rows = [
+            [n.nw.nw, n.nw.ne, n.ne.nw, n.ne.ne],
+            [n.nw.sw, n.nw.se, n.ne.sw, n.ne.se],
+            [n.sw.nw, n.sw.ne, n.se.nw, n.se.ne],
+            [n.sw.sw, n.sw.se, n.se.sw, n.se.se],
+        ]
+        b = [[c.population for c in row] for row in rows]
+
+        def rule(i, j):
+            nalive = sum(b[i + di][j + dj] for di in (-1, 0, 1) for dj in (-1, 0, 1))
+            nalive -= b[i][j]
+            if nalive == 3 or (nalive == 2 and b[i][j]):
+                return self.on
+            return self.off
+
+        return self.join(rule(1, 1), rule(1, 2), rule(2, 1), rule(2, 2))
+
+    def successor(self, node, j=None):
+        """
+        Compute the centre of a node advanced by 2^j generations.
+
+        Parameters
+        ----------
+        node: Node
+            Node of level k >= 2.
+        j: int (optional)
+            Log2 of the number of generations. Must not exceed k - 2. If None
+            is provided, j = k - 2.
+            Default: None
+
+        Returns
+        -------
+        node: Node
+            Node of level k - 1.
+        """
+        if j is None or j > node.level - 2:
+            j = node.level - 2
+        if node.population == 0:
+            return node.nw
+
+        key = (node, j)
+        result = self._successors.get(key)
+        if result is not None:
+            self._successors.move_to_end(key)
+            return result
+
+        if node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            m, join = node, self.join
+            # Nine overlapping subnodes of level k - 1
+            c = [
+                m.nw,
+                join(m.nw.ne, m.ne.nw, m.nw.se, m.ne.sw),
+                m.ne,
+                join(m.nw.sw, m.nw.se, m.sw.nw, m.sw.ne),
+                join(m.nw.se, m.ne.sw, m.sw.ne, m.se.nw),
+                join(m.ne.sw, m.ne.se, m.se.nw, m.se.ne),
+                m.sw,
+                join(m.sw.ne, m.se.nw, m.sw.se, m.se.sw),
+                m.se,
+            ]
+
+            if j == node.level - 2:
+                # Two successive steps of 2^(k - 3) generations
+                c = [self.successor(ci, j - 1) for ci in c]
+                result = join(
+                    self.successor(join(c[0], c[1], c[3], c[4]), j - 1),
+                    self.successor(join(c[1], c[2], c[4], c[5]), j - 1),
+                    self.successor(join(c[3], c[4], c[6], c[7]), j - 1),
+                    self.successor(join(c[4], c[5], c[7], c[8]), j - 1),
+                )
+            else:
+                # Single step of 2^j generations, then take the centres
+                c = [self.successor(ci, j) for ci in c]
+                result = join(
+                    join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                    join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                    join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                    join(c[4].se, c[5].sw, c[7].ne, c[8].nw),
+                )
+
+        self._successors[key] = result
+        if len(self._successors) > self.max_nodes:
+            self._successors.popitem(last=False)
+        return result
+
+    def _is_padded(self, node):
+        # All alive cells lie within the central half of the node
+        return (
+            node.nw.population == node.nw.se.se.population
+            and node.ne.population == node.ne.sw.sw.population
+            and node.sw.population == node.sw.ne.ne.population
+            and node.se.population == node.se.nw.nw.population
+        )
+
+    def advance(self, node, n_generations):
+        """
+        Advance node by n_generations. The node is padded as needed so that
+        the pattern never reaches its borders.
+
+        Parameters
+        ----------
+        node: Node
+            Node centred at the origin.
+        n_generations: int
+            Number of generations.
+
+        Returns
+        -------
+        node: Node
+            Node centred at the origin after n_generations.
+        """
+        j = 0
+        while n_generations > 0:
+            if n_generations & 1:
+                while node.level < 3 or not self._is_padded(node):
+                    node = self.centre(node)
+                while node.level < j + 3:
+                    node = self.centre(node)
+                node = self.successor(self.centre(node), j)
+            n_generations >>= 1
+            j += 1
+        return node
+
+    def from_array(self, cells):
+        """
+        Build node from cells array. The cell cells[0, 0] is placed at the
+        origin, i.e., the array occupies the south-east quadrant of the node.
+
+        Parameters
+        ----------
+        cells: numpy.ndarray shape(nrows, ncols)
+            Boolean cells.
+
+        Returns
+        -------
+        node: Node
+            Node centred at the origin.
+        """
+        level = max(1, int(np.ceil(np.log2(max(cells.shape)))))
+        size = 1 << level
+        ids = np.zeros((size, size), dtype=np.intp)
+        ids[: cells.shape[0], : cells.shape[1]] = cells
+
+        # Build the tree bottom-up, joining each distinct group of four
+        # nodes only once
+        nodes = [self.off, self.on]
+        for _ in range(level):
+            quads = np.stack(
+                [ids[0::2, 0::2], ids[0::2, 1::2], ids[1::2, 0::2], ids[1::2, 1::2]],
+                axis=-1,
+            )
+            unique, inverse = np.unique(
+                quads.reshape(-1, 4), axis=0, return_inverse=True
+            )
+            nodes = [self.join(*(nodes[i] for i in quad)) for quad in unique]
+            ids = inverse.reshape(quads.shape[:2])
+
+        z = self.zero(level)
+        return self.join(z, z, z, nodes[ids[0, 0]])
+
+    def to_array(self, node, nrows, ncols):
+        """
+        Extract window of cells starting at the origin from node.
+
+        Parameters
+        ----------
+        node: Node
+            Node centred at the origin.
+        nrows: int
+            Number of rows.
+        ncols: int
+            Number of columns.
+
+        Returns
+        -------
+        cells: numpy.ndarray shape(nrows, ncols)
+            Boolean cells.
+        """
+        cells = np.full([nrows, ncols], False, dtype=bool)
+        half = 1 << (node.level - 1)
+
+        stack = [(node, -half, -half)]
+        while stack:
+            node, top, left = stack.pop()
+            size = 1 << node.level
+            if (
+                node.population == 0
+                or top >= nrows
+                or left >= ncols
+                or top + size <= 0
+                or left + size <= 0
+            ):
+                continue
+            if node.level == 0:
+                cells[top, left] = True
+                continue
+            half = size >> 1
+            stack.append((node.nw, top, left))
+            stack.append((node.ne, top, left + half))
+            stack.append((node.sw, top + half, left))
+            stack.append((node.se, top + half, left + half))
+
+        return cells
@@ -0,0 +1,121 @@
+import numpy as np
+
+
+class QuadTree:
+    def __init__(self, positions, masses, max_depth=32):
+        """
+        Quadtree of bodies stored as flat arrays (one entry per node), used
+        to approximate the gravitational forces by the Barnes-Hut method.
+
+        Leaves hold a single body, unless max_depth is reached (bodies at
+        virtually the same position), in which case the bodies of the leaf
+        do not interact with each other.
+        """
+        self.positions = np.asarray(positions, dtype=float)
+        self.masses = np.asarray(masses, dtype=float)
+        self.max_depth = max_depth
+
+        self._size, self._mass, self._com, self._children = [], [], [], []
+        self._end = []
+        # Leaf holding each body. Nodes are numbered in depth-first order, so
+        # the subtree of node n is the range n <= node < end[n]
+        self.leaf_of = np.zeros(len(self.masses), dtype=int)
+
+        if len(self.masses) > 0:
+            lo = self.positions.min(axis=0)
+            size = (self.positions.max(axis=0) - lo).max()
+            # Slightly enlarged so that all bodies are strictly inside the root
+            size = size * (1 + 1e-9) if size > 0 else 1.0
+            self._add_node(np.arange(len(self.masses)), lo, size, 0)
+
+        self.size = np.array(self._size)
+        self.mass = np.array(self._mass)
+        self.com = np.array(self._com).reshape(-1, 2)
+        self.children = np.array(self._children, dtype=int).reshape(-1, 4)
+        self.end = np.array(self._end, dtype=int)
+        self.is_leaf = np.all(self.children < 0, axis=1)
+
+    def _add_node(self, indices, lo, size, depth):
+        node = len(self._mass)
+        masses = self.masses[indices]
+        positions = self.positions[indices]
+        mass = masses.sum()
+        if mass > 0:
+            com = masses @ positions / mass
+        else:
+            com = positions.mean(axis=0)
+
+        self._size.append(size)
+        self._mass.append(mass)
+        self._com.append(com)
+        self._children.append([-1, -1, -1, -1])
+        self._end.append(node + 1)
+
+        if len(indices) == 1 or depth == self.max_depth:
+            self.leaf_of[indices] = node
+            return node
+
+        half = size / 2
+        upper = positions >= lo + half
+        quadrant = upper[:, 0] + 2 * upper[:, 1]
+        for k in range(4):
+            sub = indices[quadrant == k]
+            if len(sub) > 0:
+                sub_lo = lo + half * np.array([k & 1, k >> 1])
+                self._children[node][k] = self._add_node(sub, sub_lo, half, depth + 1)
+        self._end[node] = len(self._mass)
+        return node
+
+    def forces(self, G=1.0, theta=0.5, softening=0.0):
+        """
+        Approximate gravitational force on each body. A node is treated as a
+        point mass at its center of mass when size / distance < theta and
+        the body is not inside it. theta = 0 gives the direct sum. softening
+        is the Plummer softening length.
+
+        The tree is traversed for all bodies at once: each iteration handles
+        every pending (body, node) pair, accepting or opening the node.
+        """
+        n = len(self.masses)
+        forces = np.zeros((n, 2))
+        bodies = np.arange(n)
+        nodes = np.zeros(n, dtype=int)
+
+        while len(bodies) > 0:
+            r = self.com[nodes] - self.positions[bodies]
+            dist = np.sqrt(np.einsum("ij,ij->i", r, r))
+            size = self.size[nodes]
+            # Whether the node contains the body, i.e., is an ancestor of (or
+            # is) the leaf of the body
+            leaf_of = self.leaf_of[bodies]
+            inside = (leaf_of >= nodes) & (leaf_of < self.end[nodes])
+            leaf = self.is_leaf[nodes]
+
+            # Leaves containing the body itself are skipped
+            accept = ~inside & (leaf | (size < theta * dist))
+            if np.any(accept):
+                b = bodies[accept]
+                d3 = (dist[accept] ** 2 + softening**2) ** 1.5
+                f = (
+                    G
+                    * (self.masses[b] * self.mass[nodes[accept]] / d3)[:, None]
+                    * r[accept]
+                )
+                for k in range(2):
+                    forces[:, k] += np.bincount(b, weights=f[:, k], minlength=n)
+
+            # Open the remaining internal nodes
+            opened = ~accept & ~leaf
+            children = self.children[nodes[opened]]
+            valid = children >= 0
+            bodies = np.repeat(bodies[opened], 4)[valid.ravel()]
+            nodes = children[valid]
+
+        return forces
+
+
+def barnes_hut_forces(positions, masses, G=1.0, theta=0.5, softening=0.0):
+    """
+    Gravitational force on each body computed with a freshly built quadtree
+    """
+    return QuadTree(positions, masses).forces(G, theta, softening)
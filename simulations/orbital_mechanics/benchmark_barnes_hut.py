@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import numpy as np
+
+from orbit_multiple_bodies import CelestialBody, PlanetarySystem
+
+
+def timed_forces(system, nrepeat):
+    # Best time (in seconds) of nrepeat force computations
+    best = np.inf
+    for _ in range(nrepeat):
+        t0 = time.perf_counter()
+        system.get_forces_all_bodies()
+        best = min(best, time.perf_counter() - t0)
+    return system.list_forces.copy(), best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Accuracy and speed of Barnes-Hut forces versus the direct sum"
+    )
+    parser.add_argument(
+        "-n",
+        "--nbodies",
+        type=int,
+        nargs="+",
+        default=[1000, 4000, 16000],
+        help="numbers of bodies",
+    )
+    parser.add_argument(
+        "-t",
+        "--theta",
+        type=float,
+        nargs="+",
+        default=[0.3, 0.5, 0.7, 1.0],
+        help="opening angles",
+    )
+    parser.add_argument(
+        "-r",
+        "--nrepeat",
+        type=int,
+        default=3,
+        help="number of repetitions of each timing",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'nbodies':>8} {'engine':>12} {'theta':>6} {'time (s)':>10} "
+        f"{'speedup':>8} {'median err':>11} {'p99 err':>9}"
+    )
+    for n in args.nbodies:
+        # Bodies in a disk with a 1/r density profile
+        radius = rng.random(n) * 10
+        angle = rng.random(n) * 2 * np.pi
+        positions = np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+        masses = rng.random(n) / n
+
+        def make_system(**kwargs):
+            system = PlanetarySystem(**kwargs)
+            for m, position in zip(masses, positions):
+                system.add_body(CelestialBody(m, position, [0, 0]))
+            return system
+
+        reference, t_direct = timed_forces(make_system(), args.nrepeat)
+        norm = np.linalg.norm(reference, axis=1)
+        print(f"{n:>8} {'vectorized':>12} {'-':>6} {t_direct:>10.4f} {1:>8.2f}")
+
+        for theta in args.theta:
+            system = make_system(engine="barnes_hut", theta=theta)
+            forces, t = timed_forces(system, args.nrepeat)
+            error = np.linalg.norm(forces - reference, axis=1) / norm
+            print(
+                f"{n:>8} {'barnes_hut':>12} {theta:>6.2f} {t:>10.4f} "
+                f"{t_direct / t:>8.2f} {np.median(error):>11.2e} {np.percentile(error, 99):>9.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import time
+
+import numpy as np
+
+from orbit_multiple_bodies import CelestialBody, PlanetarySystem
+
+
+def close_encounter_system(**kwargs):
+    # Two planets that pass within ~0.002 of each other, plus a distant one
+    system = PlanetarySystem(integrator="leapfrog", **kwargs)
+    system.add_body(CelestialBody(1.0, [0, 0], [0, 0]))
+    system.add_body(CelestialBody(1e-2, [1.0, 0], [0, 1.0]))
+    system.add_body(CelestialBody(1e-2, [1.0, -0.6], [0, 1.6]))
+    system.add_body(CelestialBody(1e-3, [-3.0, 0], [0, -(3.0**-0.5)]))
+    return system
+
+
+def run(system, total_time, dt):
+    energy0 = system.energy()
+    drift = 0.0
+    t0 = time.perf_counter()
+    for _ in range(round(total_time / dt)):
+        system.calculate_dynamics(dt)
+        drift = max(drift, abs(system.energy() / energy0 - 1))
+    return drift, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Energy drift through a close encounter with fixed and block "
+        "time steps"
+    )
+    parser.add_argument("-t", "--time", type=float, default=4.0)
+    parser.add_argument("-d", "--dt", type=float, default=0.05, help="global step")
+    parser.add_argument("-l", "--max_level", type=int, default=12)
+    parser.add_argument(
+        "-e", "--eta", type=float, nargs="+", default=[0.01, 0.002], help="eta"
+    )
+    parser.add_argument("-s", "--softening", type=float, default=0.1)
+    args = parser.parse_args()
+
+    cases = [
+        ("fixed dt", {}, args.dt),
+        ("fixed dt/64", {}, args.dt / 64),
+        (f"softening {args.softening}", {"softening": args.softening}, args.dt),
+    ]
+    for eta in args.eta:
+        cases.append(
+            (f"block eta {eta}", {"max_level": args.max_level, "eta": eta}, args.dt)
+        )
+
+    print(f"{'':>20} {'evals':>8} {'time (s)':>9} {'max |dE/E|':>11}")
+    for name, kwargs, dt in cases:
+        system = close_encounter_system(**kwargs)
+        drift, elapsed = run(system, args.time, dt)
+        nevals = system.integrator.nevals
+        print(f"{name:>20} {nevals:8d} {elapsed:9.3f} {drift:11.3e}")
+    print("Levels after the last run:", np.array2string(system.levels))
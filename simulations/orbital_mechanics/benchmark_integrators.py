@@ -0,0 +1,50 @@
+import argparse
+import time
+
+from integrators import integrators
+from orbit import Coordinates, Orbit
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Energy and angular momentum drift of the integrators on an "
+        "eccentric Kepler orbit"
+    )
+    parser.add_argument(
+        "-t", "--time", type=float, default=100.0, help="integration time"
+    )
+    parser.add_argument(
+        "-d",
+        "--dt",
+        type=float,
+        nargs="+",
+        default=[0.05, 0.01, 0.002],
+        help="time steps",
+    )
+    parser.add_argument(
+        "-v", "--velocity", type=float, default=0.5, help="initial velocity"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'integrator':>10} {'dt':>8} {'evals':>8} {'time (s)':>9} "
+        f"{'max |dE/E|':>11} {'max |dL/L|':>11}"
+    )
+    for name in integrators:
+        for dt in args.dt:
+            orbit = Orbit(Coordinates(1, 0), Coordinates(0, args.velocity), dt, name)
+            energy0, momentum0 = orbit.energy(), orbit.angular_momentum()
+            drift_energy, drift_momentum = 0.0, 0.0
+
+            t0 = time.perf_counter()
+            for _ in range(round(args.time / dt)):
+                orbit.update_orbit()
+                drift_energy = max(drift_energy, abs(orbit.energy() / energy0 - 1))
+                drift_momentum = max(
+                    drift_momentum, abs(orbit.angular_momentum() / momentum0 - 1)
+                )
+            elapsed = time.perf_counter() - t0
+
+            print(
+                f"{name:>10} {dt:8.4f} {orbit.integrator.nevals:8d} "
+                f"{elapsed:9.3f} {drift_energy:11.3e} {drift_momentum:11.3e}"
+            )
@@ -0,0 +1,174 @@
+import numpy as np
+
+
+class Integrator:
+    """
+    Integrates x'' = acceleration(x) over a time step. x and v are arrays of
+    any shape (e.g., (2,) for one orbit, (n, 2) for n bodies) and
+    acceleration maps x to an array of the same shape.
+
+    nevals counts the calls to acceleration, which dominate the cost.
+    """
+
+    def __init__(self):
+        self.nevals = 0
+
+    def _acceleration(self, acceleration, x):
+        self.nevals += 1
+        return acceleration(x)
+
+    def advance(self, x, v, dt, acceleration):
+        """
+        Returns new (x, v) after time dt
+        """
+        raise NotImplementedError
+
+
+class SemiImplicitEuler(Integrator):
+    """
+    First order symplectic Euler (velocity first, then position)
+    """
+
+    def advance(self, x, v, dt, acceleration):
+        v = v + self._acceleration(acceleration, x) * dt
+        x = x + v * dt
+        return x, v
+
+
+class Leapfrog(Integrator):
+    """
+    Second order symplectic leapfrog (drift-kick-drift form of velocity
+    Verlet), one acceleration evaluation per step
+    """
+
+    def advance(self, x, v, dt, acceleration):
+        x = x + v * (dt / 2)
+        v = v + self._acceleration(acceleration, x) * dt
+        x = x + v * (dt / 2)
+        return x, v
+
+
+class Yoshida4(Leapfrog):
+    """
+    Fourth order symplectic integrator composed by three leapfrog steps
+    (Yoshida, 1990)
+    """
+
+    w1 = 1 / (2 - 2 ** (1 / 3))
+    w0 = -(2 ** (1 / 3)) * w1
+
+    def advance(self, x, v, dt, acceleration):
+        for w in (self.w1, self.w0, self.w1):
+            x, v = super().advance(x, v, w * dt, acceleration)
+        return x, v
+
+
+class RK45(Integrator):
+    """
+    Dormand-Prince 5(4) Runge-Kutta with adaptive step size. Each call to
+    advance covers dt with as many substeps as needed to keep the local
+    error below atol + rtol * |y|, where y = (x, v). The last accepted
+    substep size is reused in the next call.
+
+    norm maps the scaled errors of x and v to the error of the substep,
+    accepted if <= 1. Default: RMS over all components.
+    """
+
+    a = [
+        [],
+        [1 / 5],
+        [3 / 40, 9 / 40],
+        [44 / 45, -56 / 15, 32 / 9],
+        [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+        [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+        [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+    ]
+    # Weights of the 5th order solution (last row of a) minus the 4th order
+    e = np.array(
+        [
+            71 / 57600,
+            0,
+            -71 / 16695,
+            71 / 1920,
+            -17253 / 339200,
+            22 / 525,
+            -1 / 40,
+        ]
+    )
+
+    def __init__(self, rtol=1e-8, atol=1e-10, max_substeps=100000, norm=None):
+        super().__init__()
+        self.rtol = rtol
+        self.atol = atol
+        self.max_substeps = max_substeps
+        self.norm = self.rms if norm is None else norm
+        self.h = None
+        self.nrejected = 0
+
+    def _substep(self, x, v, h, acceleration, a0):
+        # Stages of y' = f(y) with y = (x, v) and f(y) = (v, acceleration(x)).
+        # a0 is acceleration(x), known from the previous substep
+        kx, kv = [v], [a0]
+        for i in range(1, 7):
+            xi, vi = x, v
+            for aij, kxj, kvj in zip(self.a[i], kx, kv):
+                xi = xi + h * aij * kxj
+                vi = vi + h * aij * kvj
+            kx.append(vi)
+            kv.append(self._acceleration(acceleration, xi))
+        # First same as last: stage 7 is evaluated at the new point, so its
+        # acceleration is a0 of the next substep
+        x_new, v_new = xi, vi
+
+        error_x = h * sum(ei * k for ei, k in zip(self.e, kx))
+        error_v = h * sum(ei * k for ei, k in zip(self.e, kv))
+        scale_x = self.atol + self.rtol * np.maximum(np.abs(x), np.abs(x_new))
+        scale_v = self.atol + self.rtol * np.maximum(np.abs(v), np.abs(v_new))
+        error = self.norm(error_x / scale_x, error_v / scale_v)
+        return x_new, v_new, kv[6], error
+
+    @staticmethod
+    def rms(error_x, error_v):
+        return np.sqrt(
+            (np.sum(error_x**2) + np.sum(error_v**2)) / (2 * np.size(error_x))
+        )
+
+    def advance(self, x, v, dt, acceleration):
+        t = 0.0
+        h = dt if self.h is None else min(self.h, dt)
+        a = self._acceleration(acceleration, x)
+        for _ in range(self.max_substeps):
+            if t >= dt:
+                return x, v
+            h = min(h, dt - t)
+            x_new, v_new, a_new, error = self._substep(x, v, h, acceleration, a)
+            # Step size controller with safety factor 0.9
+            factor = 0.9 * error ** (-1 / 5) if error > 0 else 5.0
+            if error <= 1:
+                x, v, a, t = x_new, v_new, a_new, t + h
+                if t < dt:
+                    self.h = h * min(5.0, factor)
+                h = h * min(5.0, factor)
+            else:
+                self.nrejected += 1
+                h = h * max(0.2, factor)
+        raise RuntimeError(f"RK45 did not converge in {self.max_substeps} substeps")
+
+
+integrators = {
+    "euler": SemiImplicitEuler,
+    "leapfrog": Leapfrog,
+    "yoshida4": Yoshida4,
+    "rk45": RK45,
+}
+
+
+def get_integrator(integrator, **kwargs):
+    """
+    Returns Integrator instance from name (see integrators) or instance
+    """
+    if isinstance(integrator, Integrator):
+        return integrator
+    if integrator not in integrators:
+        raise ValueError(f"Unrecognized integrator {integrator}")
+    return integrators[integrator](**kwargs)
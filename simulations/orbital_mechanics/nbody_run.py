@@ -0,0 +1,138 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from orbit_multiple_bodies import PlanetarySystem, create_solar_system
+
+
+class TrajectoryWriter:
+    def __init__(self, directory, nbodies, stride=1, shard_size=1000):
+        """
+        Append-only trajectory output. The positions of one of every stride
+        steps are buffered and written to npz shards of shard_size frames,
+        named after their first step, so that memory stays bounded.
+        """
+        self.directory = directory
+        self.stride = stride
+        self.shard_size = shard_size
+        self.steps = np.empty(shard_size, dtype=np.int64)
+        self.positions = np.empty((shard_size, nbodies, 2))
+        self.nframes = 0  # frames in the buffer
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, step, positions):
+        if step % self.stride:
+            return
+        self.steps[self.nframes] = step
+        self.positions[self.nframes] = positions
+        self.nframes += 1
+        if self.nframes == self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if self.nframes == 0:
+            return
+        fname = os.path.join(self.directory, f"trajectory_{self.steps[0]:012d}.npz")
+        tmp = fname + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                steps=self.steps[: self.nframes],
+                positions=self.positions[: self.nframes],
+            )
+        os.replace(tmp, fname)
+        self.nframes = 0
+
+
+def list_shards(directory):
+    return sorted(glob.glob(os.path.join(directory, "trajectory_*.npz")))
+
+
+def load_trajectory(directory):
+    """
+    Returns steps (nframes,) and positions (nframes, nbodies, 2) from the
+    shards in directory
+    """
+    steps, positions = [], []
+    for fname in list_shards(directory):
+        with np.load(fname) as data:
+            steps.append(data["steps"])
+            positions.append(data["positions"])
+    if not steps:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0, 2))
+    return np.concatenate(steps), np.concatenate(positions)
+
+
+def run(
+    system, nsteps, dt, directory, stride=1, shard_size=1000, checkpoint_every=10000
+):
+    """
+    Runs system for nsteps steps of dt, writing the trajectory to directory
+    (see TrajectoryWriter) and a checkpoint every checkpoint_every steps.
+    If directory already holds a checkpoint, system is replaced by the
+    checkpointed state and the run resumes from it. Returns the system
+    """
+    checkpoint = os.path.join(directory, "checkpoint.npz")
+    writer = TrajectoryWriter(directory, system.nbodies, stride, shard_size)
+
+    if os.path.exists(checkpoint):
+        system, step, _ = PlanetarySystem.load_checkpoint(checkpoint)
+        # Shards are flushed before each checkpoint, so shards after the
+        # checkpoint were written by the interrupted run and are discarded
+        for fname in list_shards(directory):
+            with np.load(fname) as data:
+                if data["steps"][0] > step:
+                    os.remove(fname)
+        print(f"Resuming from step {step}")
+    else:
+        step = 0
+        writer.append(step, system.positions)
+
+    while step < nsteps:
+        system.calculate_dynamics(dt)
+        step += 1
+        writer.append(step, system.positions)
+        if step % checkpoint_every == 0 or step == nsteps:
+            writer.flush()
+            system.save_checkpoint(checkpoint, step, step * dt)
+
+    return system
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Long run of the solar system of orbit_multiple_bodies.py with "
+        "checkpoints and trajectory written to disk. Rerun with the same output "
+        "directory to resume an interrupted run"
+    )
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument("-n", "--nsteps", type=int, default=1000000)
+    parser.add_argument("-d", "--dt", type=float, default=0.01, help="time step")
+    parser.add_argument("-i", "--integrator", default="leapfrog")
+    parser.add_argument(
+        "-s", "--stride", type=int, default=100, help="steps between frames"
+    )
+    parser.add_argument(
+        "-f", "--shard_size", type=int, default=1000, help="frames per shard"
+    )
+    parser.add_argument(
+        "-c", "--checkpoint_every", type=int, default=100000, help="steps"
+    )
+    args = parser.parse_args()
+
+    system = create_solar_system(history=False, integrator=args.integrator)
+    energy0 = system.energy()
+    system = run(
+        system,
+        args.nsteps,
+        args.dt,
+        args.directory,
+        args.stride,
+        args.shard_size,
+        args.checkpoint_every,
+    )
+    steps, positions = load_trajectory(args.directory)
+    print(f"{len(steps)} frames, last step {steps[-1]}")
+    print(f"Relative energy change: {system.energy() / energy0 - 1:.3e}")
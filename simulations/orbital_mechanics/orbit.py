@@ -1,9 +1,14 @@
+import argparse
 from dataclasses import dataclass
 
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.lines import Line2D
 
+from integrators import SemiImplicitEuler, get_integrator
+from trajectory import Trajectory
+
 
 @dataclass
 class Coordinates:
@@ -13,8 +18,8 @@ class Coordinates:
 
 @dataclass
 class CoordinatesHistory:
-    x: list[float]
-    y: list[float]
+    x: np.ndarray
+    y: np.ndarray
 
 
 class Orbit:
@@ -25,15 +30,26 @@ class Orbit:
         initial_position: Coordinates = Coordinates(1, 0),
         initial_velocity: Coordinates = Coordinates(0, 1),
         time_step=0.1,
+        integrator="euler",
+        history_size=None,
+        decimation=1,
     ):
-        self.position: Coordinates = initial_position
-        self.velocity: Coordinates = initial_velocity
+        # Copies, so that the (shared) default arguments are not modified
+        self.position = Coordinates(initial_position.x, initial_position.y)
+        self.velocity = Coordinates(initial_velocity.x, initial_velocity.y)
         self.time_step = time_step
+        # Name in integrators.integrators or Integrator instance
+        self.integrator = get_integrator(integrator)
 
-        self.position_history: CoordinatesHistory = CoordinatesHistory(
-            x=[initial_position.x],
-            y=[initial_position.y],
-        )
+        # One of every decimation positions is stored, and only the last
+        # history_size stored positions are kept if history_size is given
+        self.trajectory = Trajectory(2, maxlen=history_size, decimation=decimation)
+        self.trajectory.append((self.position.x, self.position.y))
+
+    @property
+    def position_history(self) -> CoordinatesHistory:
+        data = self.trajectory.data
+        return CoordinatesHistory(x=data[:, 0], y=data[:, 1])
 
     @staticmethod
     def get_acceleration_gravity(position: Coordinates) -> Coordinates:
@@ -43,17 +59,41 @@ class Orbit:
             acceleration * position.y,
         )
 
+    @staticmethod
+    def get_acceleration_array(position: np.ndarray) -> np.ndarray:
+        return -Orbit.GM / (position[0] ** 2.0 + position[1] ** 2.0) ** 1.5 * position
+
     def update_orbit(self):
-        acceleration = self.get_acceleration_gravity(self.position)
+        position, velocity, dt = self.position, self.velocity, self.time_step
+        if type(self.integrator) is SemiImplicitEuler:
+            # Same as the integrator, but on floats without creating arrays
+            self.integrator.nevals += 1
+            acceleration = -self.GM / (position.x**2.0 + position.y**2.0) ** 1.5
+            velocity.x += acceleration * position.x * dt
+            velocity.y += acceleration * position.y * dt
+            position.x += velocity.x * dt
+            position.y += velocity.y * dt
+        else:
+            xy, vxy = self.integrator.advance(
+                np.array([position.x, position.y]),
+                np.array([velocity.x, velocity.y]),
+                dt,
+                self.get_acceleration_array,
+            )
+            position.x, position.y = xy.tolist()
+            velocity.x, velocity.y = vxy.tolist()
 
-        self.velocity.x += acceleration.x * self.time_step
-        self.velocity.y += acceleration.y * self.time_step
+        self.trajectory.append((position.x, position.y))
 
-        self.position.x += self.velocity.x * self.time_step
-        self.position.y += self.velocity.y * self.time_step
+    def energy(self) -> float:
+        # Specific orbital energy (per unit mass of the planet)
+        v2 = self.velocity.x**2.0 + self.velocity.y**2.0
+        r = (self.position.x**2.0 + self.position.y**2.0) ** 0.5
+        return 0.5 * v2 - self.GM / r
 
-        self.position_history.x.append(self.position.x)
-        self.position_history.y.append(self.position.y)
+    def angular_momentum(self) -> float:
+        # Specific angular momentum (z component)
+        return self.position.x * self.velocity.y - self.position.y * self.velocity.x
 
 
 class OrbitAnimation(Orbit):
@@ -62,11 +102,17 @@ class OrbitAnimation(Orbit):
         initial_position: Coordinates = Coordinates(1, 0),
         initial_velocity: Coordinates = Coordinates(0, 1),
         time_step=0.1,
+        integrator="euler",
+        history_size=1000,
+        decimation=1,
     ):
         super().__init__(
             initial_position,
             initial_velocity,
             time_step,
+            integrator,
+            history_size,
+            decimation,
         )
 
         self.star: Line2D
@@ -76,21 +122,33 @@ class OrbitAnimation(Orbit):
     def animate(self, *args):
         self.update_orbit()
 
-        # Update orbit. Plot only last 1000 points
-        self.orbit.set_data(
-            self.position_history.x[-1000:],
-            self.position_history.y[-1000:],
-        )
+        # Update orbit (only the last history_size points are stored)
+        position_history = self.position_history
+        self.orbit.set_data(position_history.x, position_history.y)
         # Update planet position
-        self.planet.set_data(
-            self.position_history.x[-1:],
-            self.position_history.y[-1:],
-        )
+        self.planet.set_data([self.position.x], [self.position.y])
 
         self.axis.relim()
         self.axis.autoscale_view()
 
-    def run_animation(self):
+    def precompute(self, nframes, steps_per_frame=1):
+        # Integrates the orbit up front, storing the position at each frame
+        self.frames_x = np.empty(nframes)
+        self.frames_y = np.empty(nframes)
+        self.frames_x[0], self.frames_y[0] = self.position.x, self.position.y
+        for i in range(1, nframes):
+            for _ in range(steps_per_frame):
+                self.update_orbit()
+            self.frames_x[i], self.frames_y[i] = self.position.x, self.position.y
+
+    def replay(self, i):
+        # Draws frame i from the precomputed positions (last trail frames)
+        start = max(0, i - self.trail + 1)
+        self.orbit.set_data(self.frames_x[start : i + 1], self.frames_y[start : i + 1])
+        self.planet.set_data(self.frames_x[i : i + 1], self.frames_y[i : i + 1])
+        return self.orbit, self.planet
+
+    def setup_figure(self):
         self.fig, self.axis = plt.subplots()
         self.axis.set_aspect("equal")
 
@@ -115,19 +173,91 @@ class OrbitAnimation(Orbit):
             "ro",
         )
 
+    def run_animation(self, nframes=None, steps_per_frame=1, trail=1000):
+        """
+        If nframes is None, the orbit is integrated while animating, one
+        step per frame. Otherwise, nframes frames (steps_per_frame steps
+        each) are precomputed, the axis limits are set once and the frames
+        are replayed with blitting, showing the last trail frames of the orbit
+        """
+        if nframes is None:
+            self.setup_figure()
+            return animation.FuncAnimation(
+                self.fig,
+                self.animate,  # type: ignore
+                interval=25,
+                blit=False,
+                # frames is unbounded, so frame data must not be cached
+                cache_frame_data=False,
+            )
+
+        self.precompute(nframes, steps_per_frame)
+        self.trail = trail
+        self.setup_figure()
+
+        # Axis limits enclosing the star and the whole orbit, with 5% margin
+        xmin, xmax = min(self.frames_x.min(), 0), max(self.frames_x.max(), 0)
+        ymin, ymax = min(self.frames_y.min(), 0), max(self.frames_y.max(), 0)
+        margin = 0.05 * max(xmax - xmin, ymax - ymin)
+        self.axis.set_xlim(xmin - margin, xmax + margin)
+        self.axis.set_ylim(ymin - margin, ymax + margin)
+
         return animation.FuncAnimation(
             self.fig,
-            self.animate,  # type: ignore
+            self.replay,
+            frames=nframes,
+            init_func=lambda: self.replay(0),
             interval=25,
-            blit=False,
+            blit=True,
+            cache_frame_data=False,
         )
 
+    def export(self, fname, nframes, steps_per_frame=1, trail=1000, fps=40, dpi=100):
+        """
+        Saves precomputed animation (see run_animation) to video or GIF file.
+        Frames are rendered one at a time and piped to ffmpeg if available.
+        Otherwise, GIF files are written by pillow
+        """
+        ani = self.run_animation(nframes, steps_per_frame, trail)
+        if animation.writers.is_available("ffmpeg"):
+            writer = animation.FFMpegWriter(fps=fps)
+        elif fname.lower().endswith(".gif"):
+            writer = animation.PillowWriter(fps=fps)
+        else:
+            raise RuntimeError(f"ffmpeg is required to export to {fname}")
+        ani.save(fname, writer=writer, dpi=dpi)
+        plt.close(self.fig)
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Animation of a planet orbit")
+    parser.add_argument(
+        "-v", "--velocity", type=float, default=0.5, help="initial velocity"
+    )
+    parser.add_argument("-t", "--time_step", type=float, default=0.005)
+    parser.add_argument(
+        "-n",
+        "--nframes",
+        type=int,
+        help="precompute nframes frames and replay them. Default: integrate "
+        "while animating",
+    )
+    parser.add_argument(
+        "-s", "--steps_per_frame", type=int, default=1, help="steps per frame"
+    )
+    parser.add_argument(
+        "-o", "--output", help="export animation to file (gif, mp4) without showing it"
+    )
+    args = parser.parse_args()
+
     orbit_anim = OrbitAnimation(
-        initial_velocity=Coordinates(x=0, y=0.5),
-        time_step=0.005,
+        initial_velocity=Coordinates(x=0, y=args.velocity),
+        time_step=args.time_step,
     )
 
-    ani = orbit_anim.run_animation()
-    plt.show()
+    if args.output is not None:
+        plt.switch_backend("Agg")
+        orbit_anim.export(args.output, args.nframes or 1000, args.steps_per_frame)
+    else:
+        ani = orbit_anim.run_animation(args.nframes, args.steps_per_frame)
+        plt.show()
@@ -0,0 +1,199 @@
+import argparse
+import csv
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from integrators import RK45, get_integrator
+from orbit import Orbit
+
+# Columns of the results table
+dtype = np.dtype(
+    [
+        ("x0", np.float64),
+        ("y0", np.float64),
+        ("vx0", np.float64),
+        ("vy0", np.float64),
+        ("energy", np.float64),
+        ("status", np.int8),
+        ("nsteps", np.int32),
+        ("r_min", np.float64),
+        ("r_max", np.float64),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("vx", np.float64),
+        ("vy", np.float64),
+    ]
+)
+
+
+class OrbitEnsemble:
+    GM = Orbit.GM
+    # status of each orbit. "running" orbits were not terminated (yet)
+    statuses = ("running", "escaped", "collided")
+    RUNNING, ESCAPED, COLLIDED = range(3)
+
+    def __init__(
+        self,
+        initial_positions,
+        initial_velocities,
+        time_step=0.1,
+        integrator="euler",
+        escape_radius=100.0,
+        collision_radius=1e-3,
+    ):
+        # N independent orbits around the star at (0, 0) advanced in lockstep
+        # as (N, 2) arrays. An orbit stops when its distance to the star
+        # exceeds escape_radius or falls below collision_radius
+        self.positions = np.array(initial_positions, dtype=float).reshape(-1, 2)
+        self.velocities = np.array(initial_velocities, dtype=float).reshape(-1, 2)
+        if self.positions.shape != self.velocities.shape:
+            raise ValueError("initial_positions and initial_velocities differ in size")
+        self.norbits = len(self.positions)
+        self.time_step = time_step
+        self.integrator = get_integrator(integrator)
+        if isinstance(self.integrator, RK45):
+            # The orbits share the step size, which must satisfy the error
+            # tolerance of every orbit, not only on average
+            self.integrator.norm = self.max_rms
+        self.escape_radius = escape_radius
+        self.collision_radius = collision_radius
+
+        self.initial_positions = self.positions.copy()
+        self.initial_velocities = self.velocities.copy()
+        self.initial_energy = self.energy()
+
+        self.status = np.full(self.norbits, self.RUNNING, dtype=np.int8)
+        self.nsteps = np.zeros(self.norbits, dtype=np.int32)
+        r = self.distances(self.positions)
+        self.r_min, self.r_max = r.copy(), r.copy()
+        # Indices of the running orbits
+        self.active = np.arange(self.norbits)
+        self.terminate(self.active, r)
+
+    @staticmethod
+    def max_rms(error_x, error_v):
+        # Largest RMS error of a single orbit, for the RK45 integrator
+        error2 = np.sum(error_x**2, axis=1) + np.sum(error_v**2, axis=1)
+        return np.sqrt(error2.max() / 4)
+
+    @staticmethod
+    def distances(positions):
+        return np.sqrt(np.einsum("ik,ik->i", positions, positions))
+
+    @classmethod
+    def get_acceleration_gravity(cls, positions):
+        r3 = np.einsum("ik,ik->i", positions, positions) ** 1.5
+        return -cls.GM * positions / r3[:, None]
+
+    def energy(self):
+        # Specific orbital energy of each orbit
+        v2 = np.einsum("ik,ik->i", self.velocities, self.velocities)
+        return 0.5 * v2 - self.GM / self.distances(self.positions)
+
+    def terminate(self, indices, r):
+        escaped = r > self.escape_radius
+        collided = r < self.collision_radius
+        self.status[indices[escaped]] = self.ESCAPED
+        self.status[indices[collided]] = self.COLLIDED
+        self.active = indices[~(escaped | collided)]
+
+    def step(self):
+        i = self.active
+        positions, velocities = self.integrator.advance(
+            self.positions[i],
+            self.velocities[i],
+            self.time_step,
+            self.get_acceleration_gravity,
+        )
+        self.positions[i], self.velocities[i] = positions, velocities
+        self.nsteps[i] += 1
+
+        r = self.distances(positions)
+        self.r_min[i] = np.minimum(self.r_min[i], r)
+        self.r_max[i] = np.maximum(self.r_max[i], r)
+        self.terminate(i, r)
+
+    def run(self, nsteps):
+        for _ in range(nsteps):
+            if len(self.active) == 0:
+                break
+            self.step()
+        return self.results()
+
+    def results(self):
+        """
+        Returns structured array (see dtype) with one record per orbit
+        """
+        table = np.empty(self.norbits, dtype=dtype)
+        table["x0"], table["y0"] = self.initial_positions.T
+        table["vx0"], table["vy0"] = self.initial_velocities.T
+        table["energy"] = self.initial_energy
+        table["status"] = self.status
+        table["nsteps"] = self.nsteps
+        table["r_min"], table["r_max"] = self.r_min, self.r_max
+        table["x"], table["y"] = self.positions.T
+        table["vx"], table["vy"] = self.velocities.T
+        return table
+
+
+def save_csv(fname, results):
+    with open(fname, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(dtype.names)
+        writer.writerows(results.tolist())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Maps the fate of orbits starting at (1, 0) over a grid of "
+        "initial velocities"
+    )
+    parser.add_argument(
+        "-n", "--nvelocities", type=int, default=200, help="grid points per axis"
+    )
+    parser.add_argument(
+        "-m", "--vmax", type=float, default=2.0, help="maximum initial velocity"
+    )
+    parser.add_argument("-s", "--nsteps", type=int, default=20000)
+    parser.add_argument("-d", "--dt", type=float, default=0.005, help="time step")
+    parser.add_argument("-i", "--integrator", default="leapfrog")
+    parser.add_argument("-e", "--escape_radius", type=float, default=20.0)
+    parser.add_argument("-c", "--collision_radius", type=float, default=1e-2)
+    parser.add_argument("-o", "--output", help="output csv file")
+    parser.add_argument(
+        "-x", "--headless", action="store_true", help="do not plot the map"
+    )
+    args = parser.parse_args()
+
+    v = np.linspace(-args.vmax, args.vmax, args.nvelocities)
+    vx, vy = np.meshgrid(v, v)
+    velocities = np.column_stack([vx.ravel(), vy.ravel()])
+    positions = np.tile([1.0, 0.0], (len(velocities), 1))
+
+    ensemble = OrbitEnsemble(
+        positions,
+        velocities,
+        args.dt,
+        args.integrator,
+        args.escape_radius,
+        args.collision_radius,
+    )
+    results = ensemble.run(args.nsteps)
+    for status, name in enumerate(ensemble.statuses):
+        print(f"{name}: {np.count_nonzero(results['status'] == status)}")
+
+    if args.output is not None:
+        save_csv(args.output, results)
+
+    if not args.headless:
+        fig, ax = plt.subplots()
+        ax.imshow(
+            results["status"].reshape(vx.shape),
+            origin="lower",
+            extent=(-args.vmax, args.vmax, -args.vmax, args.vmax),
+            cmap=plt.get_cmap("viridis", len(ensemble.statuses)),
+        )
+        ax.set_xlabel("vx0")
+        ax.set_ylabel("vy0")
+        plt.show()
@@ -1,30 +1,37 @@
+import json
+import os
 from itertools import cycle
 
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
 import numpy as np
 
+from barnes_hut import barnes_hut_forces
+from integrators import Leapfrog, get_integrator, integrators
+from trajectory import Trajectory
+
 
 class CelestialBody:
-    def __init__(self, mass, position, velocity, history=False):
+    def __init__(self, mass, position, velocity, history=False, history_size=None):
+        # If history_size is given, only the last history_size positions are
+        # kept (ring buffer)
         self.mass = mass
         self.position = np.array(position)
         self.velocity = np.array(velocity)
         self.history = history
         if self.history:
-            self._position_history_list = [position]
-            self._position_history = np.array(self._position_history_list).T
+            self.trajectory = Trajectory(len(self.position), maxlen=history_size)
+            self.trajectory.append(self.position)
 
     @property
     def position_history(self):
-        if self._position_history.shape[1] != len(self._position_history_list):
-            self._position_history = np.array(self._position_history_list).T
-        return self._position_history
+        # (ndim, npoints) view, without copying
+        return self.trajectory.data.T
 
     def update_position(self, position):
         self.position = position
         if self.history:
-            self._position_history_list.append(position)
+            self.trajectory.append(position)
 
     def update_velocity(self, velocity):
         self.velocity = velocity
@@ -32,20 +39,66 @@ class CelestialBody:
 
 class PlanetarySystem:
     G = 1.0  # gravitational constant
+    engines = ("loop", "vectorized", "barnes_hut")
+
+    def __init__(
+        self,
+        engine="vectorized",
+        chunk_size=1024,
+        theta=0.5,
+        integrator="euler",
+        softening=0.0,
+        max_level=0,
+        eta=0.01,
+    ):
+        # engine "loop" computes the force of each pair of bodies in Python,
+        # "vectorized" computes all pairwise forces at once with array
+        # broadcasting, in chunks of chunk_size bodies (memory is
+        # proportional to chunk_size * nbodies), and "barnes_hut"
+        # approximates the forces with a quadtree built at each step, using
+        # the opening angle theta (0 gives the direct sum).
+        # integrator is a name in integrators.integrators ("euler",
+        # "leapfrog", "yoshida4" or "rk45") or an Integrator instance.
+        # softening is the Plummer softening length: forces are computed
+        # with |r|^2 + softening^2 instead of |r|^2.
+        # If max_level > 0, close encounters are resolved by block time
+        # steps: each body is advanced with dt / 2^k, k <= max_level, such
+        # that the step is below eta times its shortest encounter time (see
+        # get_timestep_levels). This requires the leapfrog integrator
+        if engine not in self.engines:
+            raise ValueError(f"Unrecognized engine {engine}")
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.theta = theta
+        self.integrator = get_integrator(integrator)
+        self.softening = softening
+        self.max_level = max_level
+        self.eta = eta
+        if max_level > 0 and type(self.integrator) is not Leapfrog:
+            raise ValueError("Block time steps (max_level > 0) require leapfrog")
 
-    def __init__(self):
-        # pass
         self.list_bodies = []
         self.nbodies = 0
+        # State of all bodies as contiguous arrays. The CelestialBody objects
+        # are updated from them after each step
+        self.masses = np.zeros(0)
+        self.positions = np.zeros((0, 2))
+        self.velocities = np.zeros((0, 2))
         self.matrix_forces = np.zeros((0, 0, 2))
         self.list_forces = np.zeros((0, 2))
+        self.levels = np.zeros(0, dtype=int)
 
     def add_body(self, body):
         if isinstance(body, CelestialBody):
             self.list_bodies.append(body)
             self.nbodies += 1
-            self.matrix_forces = np.zeros((self.nbodies, self.nbodies, 2))
+            self.masses = np.append(self.masses, body.mass)
+            self.positions = np.vstack([self.positions, body.position])
+            self.velocities = np.vstack([self.velocities, body.velocity])
+            if self.engine == "loop":
+                self.matrix_forces = np.zeros((self.nbodies, self.nbodies, 2))
             self.list_forces = np.zeros((self.nbodies, 2))
+            self.levels = np.append(self.levels, 0)
 
             # Return index of body in self.list_bodies
             return self.nbodies - 1
@@ -54,9 +107,22 @@ class PlanetarySystem:
 
     def get_force_two_bodies(self, body1, body2):
         r = body1.position - body2.position
-        return self.G * body1.mass * body2.mass * r / np.linalg.norm(r) ** 3.0
+        dist = (np.dot(r, r) + self.softening**2) ** 0.5
+        return self.G * body1.mass * body2.mass * r / dist**3.0
+
+    def get_forces_all_bodies(self, indices=None):
+        # If indices is given, only the forces on these bodies are required
+        # (the vectorized engine computes only those)
+        if self.engine == "loop":
+            self.get_forces_loop()
+        elif self.engine == "barnes_hut":
+            self.list_forces[:, :] = barnes_hut_forces(
+                self.positions, self.masses, self.G, self.theta, self.softening
+            )
+        else:
+            self.get_forces_vectorized(indices)
 
-    def get_forces_all_bodies(self):
+    def get_forces_loop(self):
         for i in range(0, self.nbodies - 1):
             for j in range(i + 1, self.nbodies):
                 self.matrix_forces[i, j] = self.get_force_two_bodies(
@@ -66,35 +132,184 @@ class PlanetarySystem:
 
         self.list_forces[:, :] = self.matrix_forces.sum(axis=0)
 
-    def calculate_dynamics(self, dt):
-        self.get_forces_all_bodies()
-
-        for i in range(self.nbodies):
-            acceleration = self.list_forces[i] / self.list_bodies[i].mass
-            velocity = self.list_bodies[i].velocity + acceleration * dt
-            position = self.list_bodies[i].position + velocity * dt
-
-            self.list_bodies[i].update_position(position)
-            self.list_bodies[i].update_velocity(velocity)
-
-
-if __name__ == "__main__":
-    niterations = 4000
-    dt = 0.1
-    plot_last = 200
+    def get_forces_vectorized(self, indices=None):
+        # Force on body j: G m_j sum_i m_i (r_i - r_j) / |r_i - r_j|^3
+        if indices is None:
+            indices = np.arange(self.nbodies)
+        for start in range(0, len(indices), self.chunk_size):
+            rows = indices[start : start + self.chunk_size]
+            r = self.positions[None, :, :] - self.positions[rows, None, :]
+            dist3 = (np.einsum("jik,jik->ji", r, r) + self.softening**2) ** 1.5
+            # Exclude the force of each body on itself
+            dist3[np.arange(len(rows)), rows] = np.inf
+            weights = self.masses[None, :] / dist3
+            self.list_forces[rows] = (
+                self.G * self.masses[rows, None] * np.einsum("ji,jik->jk", weights, r)
+            )
+
+    def get_accelerations(self, positions, indices=None):
+        # Accelerations of all bodies, or only of bodies in indices
+        self.positions = positions
+        if self.engine == "loop":
+            # The loop engine reads the positions from the bodies
+            for body, position in zip(self.list_bodies, positions):
+                body.position = position
+        self.get_forces_all_bodies(indices)
+        if indices is None:
+            return self.list_forces / self.masses[:, None]
+        return self.list_forces[indices] / self.masses[indices, None]
+
+    def get_timestep_levels(self, dt):
+        # The encounter time of a pair of bodies is the shortest of the
+        # distance over the relative speed and the free-fall time. Level k of
+        # each body is the smallest such that dt / 2^k < eta times its
+        # shortest encounter time with any other body
+        t_min = np.full(self.nbodies, np.inf)
+        for start in range(0, self.nbodies, self.chunk_size):
+            stop = min(start + self.chunk_size, self.nbodies)
+            r = self.positions[None, :, :] - self.positions[start:stop, None, :]
+            v = self.velocities[None, :, :] - self.velocities[start:stop, None, :]
+            dist2 = np.einsum("jik,jik->ji", r, r) + self.softening**2
+            v2 = np.einsum("jik,jik->ji", v, v)
+            gm = self.G * (self.masses[start:stop, None] + self.masses[None, :])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = np.minimum(np.sqrt(dist2 / v2), np.sqrt(dist2**1.5 / gm))
+            t[np.arange(stop - start), np.arange(start, stop)] = np.inf
+            t_min[start:stop] = t.min(axis=1)
+        with np.errstate(divide="ignore"):
+            levels = np.ceil(np.log2(dt / (self.eta * t_min)))
+        return np.clip(levels, 0, self.max_level).astype(int)
+
+    def calculate_dynamics_block(self, dt):
+        # Kick-drift-kick leapfrog with block time steps. Every body drifts
+        # with the smallest step h, but is kicked only at the end of its own
+        # step dt / 2^level, with forces computed for the kicked bodies only
+        self.levels = self.get_timestep_levels(dt)
+        nsubsteps = 2 ** self.levels.max()
+        h = dt / nsubsteps
+        strides = nsubsteps >> self.levels
+        dt_bodies = dt / 2.0**self.levels
+
+        positions, velocities = self.positions.copy(), self.velocities.copy()
+        self.integrator.nevals += 1
+        accelerations = self.get_accelerations(positions)
+        velocities += 0.5 * accelerations * dt_bodies[:, None]
+        for s in range(1, nsubsteps + 1):
+            positions = positions + velocities * h
+            active = np.flatnonzero(s % strides == 0)
+            self.integrator.nevals += 1
+            accelerations = self.get_accelerations(positions, active)
+            # Closing half kick at the end of dt, otherwise two half kicks
+            kicks = dt_bodies[active] * (0.5 if s == nsubsteps else 1.0)
+            velocities[active] += accelerations * kicks[:, None]
+        return positions, velocities
 
-    sun = CelestialBody(1e0, [0, 0], [0, 0], True)
+    def calculate_dynamics(self, dt):
+        if self.max_level > 0:
+            positions, velocities = self.calculate_dynamics_block(dt)
+        else:
+            positions, velocities = self.integrator.advance(
+                self.positions, self.velocities, dt, self.get_accelerations
+            )
+        self.positions, self.velocities = positions, velocities
+
+        for i, body in enumerate(self.list_bodies):
+            body.update_position(self.positions[i].copy())
+            body.update_velocity(self.velocities[i].copy())
+
+    def kinetic_energy(self):
+        v2 = np.einsum("ik,ik->i", self.velocities, self.velocities)
+        return 0.5 * np.sum(self.masses * v2)
+
+    def potential_energy(self):
+        # -G sum_{i<j} m_i m_j / |r_i - r_j| (softened), in chunks
+        energy = 0.0
+        for start in range(0, self.nbodies, self.chunk_size):
+            stop = min(start + self.chunk_size, self.nbodies)
+            r = self.positions[None, :, :] - self.positions[start:stop, None, :]
+            dist = np.sqrt(np.einsum("jik,jik->ji", r, r) + self.softening**2)
+            dist[np.arange(stop - start), np.arange(start, stop)] = np.inf
+            energy -= self.masses[start:stop] @ (1 / dist) @ self.masses
+        return 0.5 * self.G * energy
+
+    def energy(self):
+        return self.kinetic_energy() + self.potential_energy()
+
+    def angular_momentum(self):
+        # z component of sum_i m_i r_i x v_i
+        x, y = self.positions.T
+        vx, vy = self.velocities.T
+        return np.sum(self.masses * (x * vy - y * vx))
+
+    def save_checkpoint(self, fname, step=0, time=0.0):
+        # Saves the full state (bodies, settings and integrator state) to an
+        # npz file. The file is written under a temporary name and then
+        # renamed, so that an interrupted write never corrupts the checkpoint
+        names = [n for n, cls in integrators.items() if type(self.integrator) is cls]
+        if not names:
+            raise ValueError(
+                f"Cannot checkpoint integrator {type(self.integrator).__name__}, "
+                "which is not registered in integrators.integrators"
+            )
+        integrator = names[0]
+        tmp = fname + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                masses=self.masses,
+                positions=self.positions,
+                velocities=self.velocities,
+                levels=self.levels,
+                engine=self.engine,
+                chunk_size=self.chunk_size,
+                theta=self.theta,
+                integrator=integrator,
+                integrator_state=json.dumps(vars(self.integrator)),
+                softening=self.softening,
+                max_level=self.max_level,
+                eta=self.eta,
+                step=step,
+                time=time,
+            )
+        os.replace(tmp, fname)
+
+    @classmethod
+    def load_checkpoint(cls, fname):
+        # Returns PlanetarySystem restored from save_checkpoint, step, time
+        with np.load(fname) as data:
+            integrator = get_integrator(str(data["integrator"]))
+            vars(integrator).update(json.loads(str(data["integrator_state"])))
+            system = cls(
+                str(data["engine"]),
+                int(data["chunk_size"]),
+                float(data["theta"]),
+                integrator,
+                float(data["softening"]),
+                int(data["max_level"]),
+                float(data["eta"]),
+            )
+            for mass, position, velocity in zip(
+                data["masses"], data["positions"], data["velocities"]
+            ):
+                system.add_body(CelestialBody(mass, position, velocity))
+            system.levels = data["levels"]
+            return system, int(data["step"]), float(data["time"])
+
+
+def create_solar_system(history=True, **kwargs):
+    # Sun and four planets. kwargs are passed to PlanetarySystem
+    sun = CelestialBody(1e0, [0, 0], [0, 0], history)
     GM_root = (PlanetarySystem.G * sun.mass) ** 0.5
 
     # Set initial velocity that leads to an approximate circular orbit
-    # mercury = CelestialBody(5e-3, [0.4, 0], [0, .9*GM_root/0.4**.5], True)
-    # venus = CelestialBody(1e-4, [0.7, 0], [0, GM_root/0.7**.5], True)
-    earth = CelestialBody(1e-4, [1.0, 0], [0, GM_root / 1.0**0.5], True)
-    mars = CelestialBody(5e-2, [-1.5, 0], [0, -1.03 * GM_root / 1.5**0.5], True)
-    ceres = CelestialBody(5e-2, [0, -3.0], [-0.98 * GM_root / 3.0**0.5, 0], True)
-    jupiter = CelestialBody(1e-1, [0, 5.0], [1.05 * GM_root / 5.0**0.5, 0], True)
-
-    solar_system = PlanetarySystem()
+    # mercury = CelestialBody(5e-3, [0.4, 0], [0, .9*GM_root/0.4**.5], history)
+    # venus = CelestialBody(1e-4, [0.7, 0], [0, GM_root/0.7**.5], history)
+    earth = CelestialBody(1e-4, [1.0, 0], [0, GM_root / 1.0**0.5], history)
+    mars = CelestialBody(5e-2, [-1.5, 0], [0, -1.03 * GM_root / 1.5**0.5], history)
+    ceres = CelestialBody(5e-2, [0, -3.0], [-0.98 * GM_root / 3.0**0.5, 0], history)
+    jupiter = CelestialBody(1e-1, [0, 5.0], [1.05 * GM_root / 5.0**0.5, 0], history)
+
+    solar_system = PlanetarySystem(**kwargs)
     solar_system.add_body(sun)
     # solar_system.add_body(mercury)
     # solar_system.add_body(venus)
@@ -102,6 +317,15 @@ if __name__ == "__main__":
     solar_system.add_body(mars)
     solar_system.add_body(ceres)
     solar_system.add_body(jupiter)
+    return solar_system
+
+
+if __name__ == "__main__":
+    niterations = 4000
+    dt = 0.1
+    plot_last = 200
+
+    solar_system = create_solar_system()
 
     # iterations
     for it in range(niterations):
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+class Trajectory:
+    def __init__(self, ndim=2, maxlen=None, capacity=1024, dtype=float, decimation=1):
+        """
+        Sequence of points stored in a preallocated NumPy buffer.
+
+        If maxlen is None, all points are kept and the buffer doubles its
+        capacity when full. Otherwise, it works as a ring buffer that keeps
+        only the last maxlen points in constant memory. If decimation > 1,
+        only one of every decimation appended points is stored.
+        """
+        self.ndim = ndim
+        self.maxlen = maxlen
+        self.decimation = decimation
+        self.nappended = 0  # total number of points appended
+        self.count = 0  # total number of points stored
+        if maxlen is None:
+            self._buffer = np.empty((capacity, ndim), dtype=dtype)
+        else:
+            # Each point is written twice, at i and i + maxlen, so that the
+            # last maxlen points are always contiguous in the buffer
+            self._buffer = np.empty((2 * maxlen, ndim), dtype=dtype)
+
+    def __len__(self):
+        if self.maxlen is None:
+            return self.count
+        return min(self.count, self.maxlen)
+
+    def append(self, point):
+        self.nappended += 1
+        if (self.nappended - 1) % self.decimation:
+            return
+        if self.maxlen is None:
+            if self.count == len(self._buffer):
+                buffer = np.empty(
+                    (2 * len(self._buffer), self.ndim), self._buffer.dtype
+                )
+                buffer[: self.count] = self._buffer
+                self._buffer = buffer
+            self._buffer[self.count] = point
+        else:
+            i = self.count % self.maxlen
+            self._buffer[i] = point
+            self._buffer[i + self.maxlen] = point
+        self.count += 1
+
+    @property
+    def data(self):
+        """
+        (len(self), ndim) view of the stored points, oldest first. The view
+        is not updated by later appends (which may reallocate or overwrite
+        the buffer), so it should be read again after appending
+        """
+        if self.maxlen is None or self.count < self.maxlen:
+            return self._buffer[: self.count]
+        start = self.count % self.maxlen
+        return self._buffer[start : start + self.maxlen]